@@ -0,0 +1,152 @@
+"""LLM backends for the voter calls.
+
+A backend is anything shaped like AsyncOpenAI as far as a panel uses it:
+`chat.completions.create(...)` returning choices (and usage), `models.list()`
+for warm-up, and `close()`. Pick one with VOTE_LLM_BACKEND:
+
+    openai              api.openai.com; needs OPENAI_API_KEY
+    openai_compatible   any chat completions server at VOTE_LLM_BASE_URL (vLLM,
+                        llama.cpp, Ollama, bench/mock_llm.py); key from VOTE_LLM_API_KEY
+    mock                MockLLM, in-process and offline: seeded, persona-dependent
+                        ballots with configurable latency and failure rates
+
+Setting VOTE_LLM_BASE_URL alone selects openai_compatible.
+"""
+import os, json, ast, re, random, asyncio, zlib
+from types import SimpleNamespace
+from typing import List, Optional
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, RateLimitError, InternalServerError
+
+BACKENDS = ("openai","openai_compatible","mock")
+BASE_URL = os.getenv("VOTE_LLM_BASE_URL","")
+BACKEND = os.getenv("VOTE_LLM_BACKEND", "openai_compatible" if BASE_URL else "openai")
+MOCK_LATENCY_S = float(os.getenv("VOTE_MOCK_LATENCY_S","0.05"))
+MOCK_JITTER_S = float(os.getenv("VOTE_MOCK_JITTER_S","0.05"))
+MOCK_ERROR_RATE = float(os.getenv("VOTE_MOCK_ERROR_RATE","0"))
+MOCK_RATE_LIMIT_RATE = float(os.getenv("VOTE_MOCK_RATE_LIMIT_RATE","0"))
+MOCK_SEED = int(os.getenv("VOTE_MOCK_SEED","0"))
+
+def backend_problem(name:Optional[str]=None) -> Optional[str]:
+    """Why backend `name` (default: the configured one) cannot be used, or None when it can."""
+    name = name or BACKEND
+    if name not in BACKENDS:
+        return f"Unknown VOTE_LLM_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}"
+    if name == "openai" and "OPENAI_API_KEY" not in os.environ:
+        return "Missing OPENAI_API_KEY"
+    if name == "openai_compatible" and not BASE_URL:
+        return "Missing VOTE_LLM_BASE_URL"
+    return None
+
+def make_backend(name:Optional[str]=None, limits:Optional[httpx.Limits]=None):
+    """A client for backend `name`; HTTP backends get a keep-alive pool with `limits` and no SDK retries."""
+    name = name or BACKEND
+    problem = backend_problem(name)
+    if problem:
+        raise ValueError(problem)
+    if name == "mock":
+        return MockLLM(MOCK_LATENCY_S, MOCK_JITTER_S, MOCK_ERROR_RATE, MOCK_RATE_LIMIT_RATE, MOCK_SEED)
+    http = DefaultAsyncHttpxClient(limits=limits) if limits else None
+    if name == "openai_compatible":
+        return AsyncOpenAI(api_key=os.getenv("VOTE_LLM_API_KEY","none"), base_url=BASE_URL, max_retries=0,
+                           http_client=http)
+    return AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"], max_retries=0, http_client=http)
+
+def cache_namespace(model:str, name:Optional[str]=None) -> str:
+    """What the response cache keys on for `model`, so mock or local answers never replay as OpenAI's."""
+    name = name or BACKEND
+    if name == "openai": return model
+    if name == "mock": return f"mock:{MOCK_SEED}:{model}"
+    return f"{BASE_URL}|{model}"
+
+OPTIONS = re.compile(r"^Options: (\[.*\])$", re.M)
+MODE = re.compile(r"^- Mode = (\w+)$", re.M)
+
+def mock_ballot(persona:str, options:List[str], seed:int=0, model:str="mock", temperature:float=0.0,
+                mode:str="ranking") -> dict:
+    """A ballot with scores: the persona and seed fix the preferences, model and temperature perturb them.
+
+    `ranking` gets the full order, `forced_choice` the top option and
+    `approval` every option scored 0.5 or more (at least the top one).
+    """
+    base = random.Random(zlib.crc32(persona.encode("utf-8")) ^ seed)
+    noise = random.Random(zlib.crc32(f"{persona}|{model}|{temperature}".encode("utf-8")) ^ seed)
+    scores = {o: round(min(1.0, max(0.0, base.random() + temperature * (noise.random() - 0.5))), 3) for o in options}
+    order = sorted(options, key=scores.get, reverse=True)
+    if mode == "forced_choice":
+        order = order[:1]
+    elif mode == "approval":
+        order = [o for o in order if scores[o] >= 0.5] or order[:1]
+    return {"selection": order, "scores": scores, "justification": "Mock ballot.",
+            "confidence": round(0.5 + base.random() / 2, 3)}
+
+def mock_answer(prompt:str, seed:int=0, model:str="mock", temperature:float=0.0) -> str:
+    """The JSON a voter prompt (single or batched) gets from the mock."""
+    found = OPTIONS.search(prompt)
+    options = ast.literal_eval(found.group(1)) if found else ["A","B"]
+    mode = MODE.search(prompt)
+    mode = mode.group(1) if mode else "ranking"
+    personas = [(l, p) for l, p in map(_persona, prompt.splitlines()) if p is not None]
+    if '"ballots"' in prompt:
+        return json.dumps({"ballots": [dict(mock_ballot(l, options, seed, model, temperature, mode), id=p.get("id"))
+                                       for l, p in personas]})
+    return json.dumps(mock_ballot(personas[0][0] if personas else prompt, options, seed, model, temperature, mode))
+
+def _persona(line:str):
+    """(line, persona) for a line holding a persona's JSON, else (line, None)."""
+    if not line.startswith("{") or len(line) < 3:
+        return line, None
+    try:
+        p = json.loads(line)
+    except ValueError:
+        return line, None
+    return line, p if isinstance(p, dict) else None
+
+class MockLLM:
+    """In-process stand-in for AsyncOpenAI.
+
+    Latency and failures are drawn from the prompt, the seed and how often
+    that prompt has been sent, never from call order, so a run is
+    reproducible at any concurrency and a retried call can succeed.
+    """
+    def __init__(self, latency:float=MOCK_LATENCY_S, jitter:float=MOCK_JITTER_S, error_rate:float=MOCK_ERROR_RATE,
+                 rate_limit_rate:float=MOCK_RATE_LIMIT_RATE, seed:int=MOCK_SEED):
+        self.latency, self.jitter, self.seed = latency, jitter, seed
+        self.error_rate, self.rate_limit_rate = error_rate, rate_limit_rate
+        self.calls, self.sent = 0, {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.models = SimpleNamespace(list=self.list_models)
+
+    async def create(self, messages, model:str="mock", temperature:float=0.0, **kw):
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        key = zlib.crc32(prompt.encode("utf-8"))
+        attempt = self.sent[key] = self.sent.get(key, 0) + 1
+        self.calls += 1
+        rng = random.Random(key ^ self.seed ^ (attempt << 32))
+        await asyncio.sleep(self.latency + self.jitter * rng.random())
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            raise RateLimitError("Rate limit reached (mock)", response=_response(429), body=None)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise InternalServerError("Internal error (mock)", response=_response(500), body=None)
+        content = mock_answer(prompt, self.seed, model, temperature)
+        n_in, n_out = len(prompt) // 4, len(content) // 4
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=n_in, completion_tokens=n_out, total_tokens=n_in + n_out,
+                                  prompt_tokens_details=None))
+
+    async def list_models(self):
+        return SimpleNamespace(data=[SimpleNamespace(id="mock")])
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+def _response(status:int) -> httpx.Response:
+    return httpx.Response(status, request=httpx.Request("POST", "http://mock/v1/chat/completions"))
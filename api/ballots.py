@@ -0,0 +1,95 @@
+"""Columnar ballot storage for a panel.
+
+One row per voter, one column per option:
+
+    ranks       int32 (n x m)   position of each option on the ballot, m = not selected
+                                (the rank matrix api/tally_np.py counts on)
+    scores      float32 (n x m) per-option utility, NaN where the voter gave none
+    confidence  float32 (n)
+    just_idx    int32 (n)       index into `justifications`, an interned string table
+
+Tallies, the bootstrap and early stopping read the arrays directly;
+VoterResult objects are only built when a response includes voters.
+Scores for labels that are not options are dropped.
+"""
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from .models import VoterResult
+
+class BallotTable:
+    def __init__(self, options:List[str], n:int):
+        m = len(options)
+        self.options = options
+        self.index = {o:j for j,o in enumerate(options)}
+        self.ids: List[str] = ["anon"] * n
+        self.ranks = np.full((n, m), m, dtype=np.int32)
+        self.scores = np.full((n, m), np.nan, dtype=np.float32)
+        self.confidence = np.zeros(n, dtype=np.float32)
+        self.just_idx = np.zeros(n, dtype=np.int32)
+        self.justifications: List[str] = [""]
+        self._interned: Dict[str,int] = {"": 0}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def set(self, i:int, persona_id:str, out:dict) -> None:
+        """Store one parsed ballot; raises on malformed fields, leaving row i untouched."""
+        m = len(self.options)
+        rank, score = [m] * m, [np.nan] * m
+        for p, o in enumerate(out.get("selection", [])):
+            j = self.index.get(o)
+            if j is not None and rank[j] == m: rank[j] = p
+        for o, v in (out.get("scores") or {}).items():
+            j = self.index.get(o)
+            if j is not None: score[j] = float(v)
+        confidence = float(out.get("confidence", 0.0))
+        k = self._intern(str(out.get("justification", "")))
+        self.ids[i] = persona_id
+        self.ranks[i], self.scores[i], self.confidence[i], self.just_idx[i] = rank, score, confidence, k
+
+    def selection(self, i:int) -> List[str]:
+        row = self.ranks[i]
+        return [self.options[j] for j in np.argsort(row, kind="stable") if row[j] < len(self.options)]
+
+    def selections(self) -> List[List[str]]:
+        return [self.selection(i) for i in range(len(self))]
+
+    def voter_dict(self, i:int) -> dict:
+        scores = {o: round(float(s), 6) for o, s in zip(self.options, self.scores[i]) if not np.isnan(s)}
+        return {"id": self.ids[i], "selection": self.selection(i), "scores": scores,
+                "justification": self.justifications[self.just_idx[i]],
+                "confidence": round(float(self.confidence[i]), 6)}
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(len(self))[i]]
+        return VoterResult(**self.voter_dict(i))
+
+    def __iter__(self) -> Iterator[VoterResult]:
+        return (self[i] for i in range(len(self)))
+
+    def to_voters(self, start:int=0, stop:Optional[int]=None, fields:Optional[List[str]]=None) -> List[VoterResult]:
+        """VoterResults for rows [start, stop); with `fields`, only those are set (and serialized)."""
+        rows = range(len(self))[start:stop]
+        if fields is None:
+            return [VoterResult.model_construct(**self.voter_dict(i)) for i in rows]
+        return [VoterResult.model_construct(**{k: v for k, v in self.voter_dict(i).items() if k in fields}) for i in rows]
+
+    @classmethod
+    def concat(cls, options:List[str], tables:List["BallotTable"]) -> "BallotTable":
+        out = cls(options, 0)
+        for t in tables:
+            remap = np.array([out._intern(s) for s in t.justifications], dtype=np.int32)
+            out.ids += t.ids
+            out.ranks = np.vstack([out.ranks, t.ranks])
+            out.scores = np.vstack([out.scores, t.scores])
+            out.confidence = np.concatenate([out.confidence, t.confidence])
+            out.just_idx = np.concatenate([out.just_idx, remap[t.just_idx]])
+        return out
+
+    def _intern(self, text:str) -> int:
+        k = self._interned.get(text)
+        if k is None:
+            k = self._interned[text] = len(self.justifications)
+            self.justifications.append(text)
+        return k
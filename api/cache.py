@@ -0,0 +1,69 @@
+"""Persistent cache of voter LLM responses.
+
+Entries are content-addressed: the key hashes everything that shapes a
+voter's prompt and sampling (model, temperature, seed, persona, brief,
+question, options, mode, prompt layout), so re-running a concept test - e.g. under a
+different counting rule - replays the stored ballots instead of paying for
+new calls. Backed by a single SQLite file with LRU eviction past
+`max_entries` and a TTL on every entry.
+"""
+import os, json, time, hashlib
+from typing import Dict, Iterable, List, Optional
+from .storage import sqlite_connect
+
+CACHE_PATH = os.getenv("VOTE_CACHE_PATH", ".cache/votes.sqlite3")   # "" disables the cache
+CACHE_MAX_ENTRIES = int(os.getenv("VOTE_CACHE_MAX_ENTRIES","200000"))
+CACHE_TTL_S = float(os.getenv("VOTE_CACHE_TTL_S", str(7*24*3600)))
+
+def cache_key(model:str, temperature:float, seed:Optional[int], persona:dict,
+              brief:str, question:str, options:List[str], mode:str, layout:str="persona_first") -> str:
+    key = [model, temperature, seed, persona, brief, question, options, mode]
+    if layout != "persona_first": key.append(layout)    # keeps keys from before layouts existed valid
+    blob = json.dumps(key,
+                      sort_keys=True, ensure_ascii=False, separators=(",",":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    def __init__(self, path:str=CACHE_PATH, max_entries:int=CACHE_MAX_ENTRIES, ttl_s:float=CACHE_TTL_S):
+        self.path, self.max_entries, self.ttl_s = path, max_entries, ttl_s
+        with sqlite_connect(path, create=True) as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL,
+                created REAL NOT NULL, last_used REAL NOT NULL)""")
+            db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_used)")
+
+    def get_many(self, keys:Iterable[str]) -> Dict[str,str]:
+        keys = list(dict.fromkeys(keys))
+        if not keys: return {}
+        now, hits = time.time(), {}
+        with sqlite_connect(self.path) as db:
+            db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_s,))
+            for i in range(0, len(keys), 500):    # stay under SQLite's bound-parameter limit
+                chunk = keys[i:i+500]
+                rows = db.execute(f"SELECT key, value FROM responses WHERE key IN ({','.join('?'*len(chunk))})", chunk)
+                hits.update(rows.fetchall())
+            db.executemany("UPDATE responses SET last_used=? WHERE key=?", [(now, k) for k in hits])
+        return hits
+
+    def put_many(self, items:Dict[str,str]) -> None:
+        if not items: return
+        now = time.time()
+        with sqlite_connect(self.path) as db:
+            db.executemany("INSERT OR REPLACE INTO responses VALUES (?,?,?,?)",
+                           [(k, v, now, now) for k, v in items.items()])
+            (n,) = db.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if n > self.max_entries:
+                db.execute("""DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_used LIMIT ?)""", (n - self.max_entries,))
+
+    def clear(self) -> None:
+        with sqlite_connect(self.path) as db:
+            db.execute("DELETE FROM responses")
+
+_cache = None
+
+def get_cache() -> Optional[ResponseCache]:
+    global _cache
+    if _cache is None and CACHE_PATH:
+        _cache = ResponseCache()
+    return _cache
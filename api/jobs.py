@@ -0,0 +1,268 @@
+"""Background jobs for panels that outlive one HTTP request.
+
+Submitting a VoteRequest stores it and returns a job ID at once; a small
+pool of workers on the server's event loop runs queued jobs. The panel's
+personas are saved before the first call and every finished ballot is
+checkpointed every few seconds, so a job cut off by a restart is resumed
+on the next start: only the voters without a checkpointed ballot are
+polled again. Several server processes may share one jobs database
+(`uvicorn --workers N`): a worker claims a job atomically before running
+it and renews the claim while it runs. A job whose claim has not
+been renewed for LEASE_S (its process died) is taken over by another
+worker; a clean shutdown releases its claims at once.
+"""
+import os, json, time, socket, uuid, asyncio
+from typing import Dict, List, Optional
+from .models import VoteRequest, VoteResponse, VoterResult, VoterView, JobStatus
+from .ballots import BallotTable
+from .tally import aggregate
+from .runs import new_run_id, save_run
+from .metrics import span, add_time
+from .storage import sqlite_connect
+from . import vote
+
+JOBS_PATH = os.getenv("VOTE_JOBS_PATH", ".cache/jobs.sqlite3")   # "" disables the job queue
+JOBS_MAX = int(os.getenv("VOTE_JOBS_MAX","1000"))                 # finished jobs kept
+JOB_WORKERS = int(os.getenv("VOTE_JOB_WORKERS","2"))              # jobs run at the same time
+CHECKPOINT_S = float(os.getenv("VOTE_JOB_CHECKPOINT_S","2"))      # seconds between ballot checkpoints
+LEASE_S = float(os.getenv("VOTE_JOB_LEASE_S","30"))               # a claim not renewed for this long is stale
+
+class JobStore:
+    def __init__(self, path:str=JOBS_PATH, max_jobs:int=JOBS_MAX):
+        self.path, self.max_jobs = path, max_jobs
+        with sqlite_connect(path, create=True) as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY, created REAL NOT NULL, status TEXT NOT NULL,
+                request TEXT NOT NULL, personas TEXT, result TEXT, error TEXT)""")
+            columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+            for column in ("owner TEXT", "heartbeat REAL"):     # databases from before job claims
+                if column.split()[0] not in columns:
+                    db.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+            db.execute("""CREATE TABLE IF NOT EXISTS ballots (
+                job_id TEXT NOT NULL, idx INTEGER NOT NULL, ballot TEXT NOT NULL,
+                PRIMARY KEY (job_id, idx))""")
+
+    def create(self, job_id:str, req:VoteRequest) -> None:
+        with sqlite_connect(self.path) as db:
+            db.execute("INSERT INTO jobs (job_id, created, status, request) VALUES (?,?,?,?)",
+                       (job_id, time.time(), "queued", req.model_dump_json()))
+
+    def claim(self, job_id:str, owner:str, lease_s:float=LEASE_S) -> bool:
+        """Atomically take a queued job, or a running one whose claim is stale or released."""
+        now = time.time()
+        with sqlite_connect(self.path) as db:
+            cur = db.execute("""UPDATE jobs SET status='running', owner=?, heartbeat=? WHERE job_id=? AND (
+                status='queued' OR (status='running' AND (owner IS NULL OR owner=? OR heartbeat < ?)))""",
+                             (owner, now, job_id, owner, now - lease_s))
+        return cur.rowcount == 1
+
+    def renew(self, job_id:str, owner:str) -> None:
+        with sqlite_connect(self.path) as db:
+            db.execute("UPDATE jobs SET heartbeat=? WHERE job_id=? AND owner=?", (time.time(), job_id, owner))
+
+    def release(self, job_id:str, owner:str) -> None:
+        with sqlite_connect(self.path) as db:
+            db.execute("UPDATE jobs SET owner=NULL, heartbeat=NULL WHERE job_id=? AND owner=?", (job_id, owner))
+
+    def set_personas(self, job_id:str, personas:List[dict]) -> None:
+        with sqlite_connect(self.path) as db:
+            db.execute("UPDATE jobs SET personas=?, status='running' WHERE job_id=?",
+                       (json.dumps(personas, ensure_ascii=False), job_id))
+
+    def add_ballots(self, job_id:str, ballots:Dict[int,dict]) -> None:
+        with sqlite_connect(self.path) as db:
+            db.executemany("INSERT OR REPLACE INTO ballots VALUES (?,?,?)",
+                           [(job_id, i, json.dumps(b, ensure_ascii=False)) for i, b in ballots.items()])
+
+    def finish(self, job_id:str, status:str, result:Optional[str]=None, error:Optional[str]=None,
+               owner:Optional[str]=None) -> None:
+        """Record the outcome and drop the checkpoint; keeps the newest `max_jobs` finished jobs.
+
+        With `owner`, only while that worker still holds the job's claim.
+        """
+        with sqlite_connect(self.path) as db:
+            cur = db.execute("UPDATE jobs SET status=?, result=?, error=? WHERE job_id=? AND (? IS NULL OR owner=?)",
+                             (status, result, error, job_id, owner, owner))
+            if cur.rowcount == 0: return
+            db.execute("DELETE FROM ballots WHERE job_id=?", (job_id,))
+            db.execute("""DELETE FROM jobs WHERE job_id IN (
+                SELECT job_id FROM jobs WHERE status IN ('done','failed')
+                ORDER BY created DESC LIMIT -1 OFFSET ?)""", (self.max_jobs,))
+
+    def load(self, job_id:str) -> Optional[dict]:
+        with sqlite_connect(self.path) as db:
+            row = db.execute("SELECT status, request, personas, result, error FROM jobs WHERE job_id=?",
+                             (job_id,)).fetchone()
+        if row is None: return None
+        return {"status": row[0], "request": VoteRequest.model_validate_json(row[1]),
+                "personas": json.loads(row[2]) if row[2] else None, "result": row[3], "error": row[4]}
+
+    def load_ballots(self, job_id:str) -> Dict[int,dict]:
+        with sqlite_connect(self.path) as db:
+            rows = db.execute("SELECT idx, ballot FROM ballots WHERE job_id=?", (job_id,)).fetchall()
+        return {i: json.loads(b) for i, b in rows}
+
+    def unfinished(self) -> List[str]:
+        with sqlite_connect(self.path) as db:
+            rows = db.execute("SELECT job_id FROM jobs WHERE status IN ('queued','running') ORDER BY created").fetchall()
+        return [r[0] for r in rows]
+
+    def claimable(self, lease_s:float=LEASE_S) -> List[str]:
+        """Unfinished jobs no live worker holds: queued, released, or with a stale claim."""
+        with sqlite_connect(self.path) as db:
+            rows = db.execute("""SELECT job_id FROM jobs WHERE status='queued' OR (status='running'
+                AND (owner IS NULL OR heartbeat < ?)) ORDER BY created""", (time.time() - lease_s,)).fetchall()
+        return [r[0] for r in rows]
+
+class JobQueue:
+    """Worker pool on the running event loop.
+
+    `start` also queues jobs no live worker holds, and every LEASE_S picks up
+    jobs whose worker stopped renewing its claim.
+    """
+    def __init__(self, store:JobStore, workers:int=JOB_WORKERS):
+        self.store, self.workers = store, workers
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.queue: Optional[asyncio.Queue] = None
+        self.queued: set = set()
+        self.tasks: List[asyncio.Task] = []
+        self.live: Dict[str, Dict[int, List[str]]] = {}   # job_id -> selections so far, by persona index
+
+    def start(self) -> None:
+        if self.tasks: return
+        self.queue = asyncio.Queue()
+        self._enqueue(self.store.claimable())
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        """Cancel the workers; running jobs keep their checkpoint and release their claim, so any worker resumes them."""
+        for t in self.tasks: t.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks, self.queue = [], None
+        self.queued.clear()
+
+    def _enqueue(self, job_ids:List[str]) -> None:
+        for job_id in job_ids:
+            if job_id not in self.queued:
+                self.queued.add(job_id)
+                self.queue.put_nowait(job_id)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(LEASE_S)
+            self._enqueue(await asyncio.to_thread(self.store.claimable))
+
+    async def submit(self, req:VoteRequest) -> JobStatus:
+        self.start()
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.store.create, job_id, req)
+        self._enqueue([job_id])
+        return JobStatus(job_id=job_id, status="queued", total=req.n_voters)
+
+    async def status(self, job_id:str) -> Optional[JobStatus]:
+        job = await asyncio.to_thread(self.store.load, job_id)
+        if job is None: return None
+        req, personas = job["request"], job["personas"]
+        total = len(personas) if personas is not None else req.n_voters
+        if job["result"]:
+            resp = VoteResponse.model_validate_json(job["result"])
+            return JobStatus(job_id=job_id, status=job["status"], done=resp.sample, total=total, tallies=resp.tallies,
+                             winners=resp.winners or [], winner=resp.winner, run_id=resp.run_id)
+        if job_id in self.live:
+            selections = list(self.live[job_id].values())
+        else:
+            selections = [b["selection"] for b in (await asyncio.to_thread(self.store.load_ballots, job_id)).values()]
+        status = JobStatus(job_id=job_id, status=job["status"], done=len(selections), total=total, error=job["error"])
+        if selections:
+            status.tallies, status.winners, status.winner = aggregate(req.rule, req.options, selections)
+        return status
+
+    async def result(self, job_id:str) -> Optional[VoteResponse]:
+        job = await asyncio.to_thread(self.store.load, job_id)
+        return None if job is None or not job["result"] else VoteResponse.model_validate_json(job["result"])
+
+    async def _work(self):
+        while True:
+            job_id = await self.queue.get()
+            self.queued.discard(job_id)
+            if not await asyncio.to_thread(self.store.claim, job_id, self.owner):
+                continue    # finished, or another worker has it
+            keepalive = asyncio.create_task(self._renew(job_id))
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                await asyncio.shield(asyncio.to_thread(self.store.release, job_id, self.owner))
+                raise
+            except Exception as e:
+                await asyncio.to_thread(self.store.finish, job_id, "failed", None, str(e), self.owner)
+            finally:
+                keepalive.cancel()
+                self.live.pop(job_id, None)
+
+    async def _renew(self, job_id:str):
+        while True:
+            await asyncio.sleep(LEASE_S / 3)
+            await asyncio.to_thread(self.store.renew, job_id, self.owner)
+
+    async def _run(self, job_id:str):
+        job = await asyncio.to_thread(self.store.load, job_id)
+        if job is None or job["status"] != "running": return
+        req, personas = job["request"], job["personas"]
+        persona_s = 0.0
+        if personas is None:
+            personas, persona_s = await vote.timed_personas(req)
+            await asyncio.to_thread(self.store.set_personas, job_id, personas)
+        saved = await asyncio.to_thread(self.store.load_ballots, job_id)
+        live = self.live[job_id] = {i: b["selection"] for i, b in saved.items()}
+        todo = [i for i in range(len(personas)) if i not in saved]
+        pending: Dict[int,dict] = {}
+
+        def on_voter(j, v):
+            pending[todo[j]] = v.model_dump()
+            live[todo[j]] = v.selection
+
+        def flush():
+            batch = dict(pending); pending.clear()
+            return batch
+
+        async def checkpoint():
+            while True:
+                await asyncio.sleep(CHECKPOINT_S)
+                if pending: await asyncio.to_thread(self.store.add_ballots, job_id, flush())
+
+        stats = vote.new_stats()
+        stats["resumed"] = len(saved)
+        add_time(stats, "personas", persona_s)
+        saver = asyncio.create_task(checkpoint())
+        try:
+            with span(stats, "poll"):
+                fresh = await vote.poll_panel(vote.get_async_client(), [personas[i] for i in todo], req, stats, on_voter)
+        finally:
+            saver.cancel()
+            if pending:   # also on cancel, so nothing polled is lost
+                await asyncio.shield(asyncio.to_thread(self.store.add_ballots, job_id, flush()))
+
+        rows = {**saved, **{todo[j]: fresh.voter_dict(j) for j in range(len(fresh))}}   # early stop may leave a tail
+        ballots = BallotTable(req.options, len(rows))
+        for k, i in enumerate(sorted(rows)):
+            ballots.set(k, rows[i]["id"], rows[i])
+        resp = await asyncio.to_thread(vote.build_response, req, ballots, stats, new_run_id())
+        await asyncio.to_thread(save_run, resp.run_id, req, ballots)
+        await asyncio.to_thread(self.store.finish, job_id, "done", resp.model_dump_json(exclude_unset=True), None, self.owner)
+
+def apply_view(resp:VoteResponse, view:VoterView) -> VoteResponse:
+    """The stored response trimmed to `view`, like build_response would have done."""
+    stop = None if view.limit is None else view.offset + view.limit
+    voters = [] if view.summary else resp.voters[view.offset:stop]
+    if view.fields:
+        voters = [VoterResult.model_construct(**v.model_dump(include=set(view.fields))) for v in voters]
+    return resp.model_copy(update={"voters": voters})
+
+_queue = None
+
+def get_job_queue() -> Optional[JobQueue]:
+    global _queue
+    if _queue is None and JOBS_PATH:
+        _queue = JobQueue(JobStore())
+    return _queue
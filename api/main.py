@@ -1,12 +1,32 @@
-import os
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Depends, Header
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from .models import VoteRequest, VoteResponse
-from .vote import run_vote
+from typing import Optional
+from .models import (VoteRequest, VoteResponse, Rule, RuleResult, RetallyResponse, VoterView,
+                     BatchVoteRequest, BatchVoteResponse, JobStatus, SweepRequest, SweepResponse)
+from .vote import run_vote_async, run_batch_async, run_sweep_async, stream_vote, open_client, close_client
+from .runs import get_run_store
+from .tally import RULES, aggregate
+from .serialize import dumps, encode_response, check_accept
+from .jobs import get_job_queue, apply_view
+from .backends import backend_problem
+from . import metrics
 
 load_dotenv()
-app = FastAPI(title="Concept Vote Simulator")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if backend_problem() is None:
+        await open_client()    # pool (and optional warm-up) before the first request
+    jobs = get_job_queue()
+    if jobs: jobs.start()      # resumes jobs an earlier process left unfinished
+    yield
+    if jobs: await jobs.stop()
+    await close_client()
+
+app = FastAPI(title="Concept Vote Simulator", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
 )
@@ -14,8 +34,101 @@ app.add_middleware(
 @app.get("/healthz")
 def healthz(): return {"ok": True}
 
-@app.post("/v1/concept/vote", response_model=VoteResponse)
-def concept_vote(req: VoteRequest):
-    if "OPENAI_API_KEY" not in os.environ:
-        raise HTTPException(500, "Missing OPENAI_API_KEY")
-    return run_vote(req)
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Process-wide run, stage, LLM latency and token metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def require_backend():
+    problem = backend_problem()
+    if problem:
+        raise HTTPException(500, problem)
+
+def voter_view(
+    summary: bool = Query(False, description="Tallies and details only, no voters."),
+    offset: int = Query(0, ge=0, description="First voter to include."),
+    limit: Optional[int] = Query(None, ge=0, description="Max voters to include."),
+    fields: Optional[str] = Query(None, description="Comma-separated voter fields, e.g. id,selection,confidence."),
+) -> VoterView:
+    try:
+        return VoterView(summary=summary, offset=offset, limit=limit,
+                         fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None)
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+
+@app.post("/v1/concept/vote", response_model=VoteResponse, response_model_exclude_unset=True)
+async def concept_vote(req: VoteRequest, view: VoterView = Depends(voter_view), accept: Optional[str] = Header(None)):
+    """JSON by default; send `Accept: application/msgpack` for MessagePack."""
+    require_backend()
+    check_accept(accept)
+    return encode_response(await run_vote_async(req, view=view), accept)
+
+@app.post("/v1/concept/vote/batch", response_model=BatchVoteResponse, response_model_exclude_unset=True)
+async def concept_vote_batch(batch: BatchVoteRequest, view: VoterView = Depends(voter_view), accept: Optional[str] = Header(None)):
+    """Several questions over one shared panel and concurrency budget; `view` applies to every result."""
+    require_backend()
+    check_accept(accept)
+    return encode_response(await run_batch_async(batch, view), accept)
+
+@app.post("/v1/concept/vote/sweep", response_model=SweepResponse, response_model_exclude_unset=True)
+async def concept_vote_sweep(sweep: SweepRequest, accept: Optional[str] = Header(None)):
+    """The same panel under every model x temperature, with a side-by-side tally matrix; re-tally a cell via its run_id."""
+    require_backend()
+    check_accept(accept)
+    return encode_response(await run_sweep_async(sweep), accept)
+
+@app.post("/v1/concept/vote/stream")
+async def concept_vote_stream(req: VoteRequest, view: VoterView = Depends(voter_view)):
+    """NDJSON stream: a line per voter as it finishes, running tallies, then the full VoteResponse."""
+    require_backend()
+    async def lines():
+        async for event in stream_vote(req, view=view):
+            yield dumps(event) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def job_queue():
+    jobs = get_job_queue()
+    if jobs is None:
+        raise HTTPException(503, "Job queue disabled (VOTE_JOBS_PATH is empty)")
+    return jobs
+
+@app.post("/v1/concept/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(req: VoteRequest):
+    """Queue a panel and return its job ID at once; poll /v1/concept/jobs/{job_id} for progress."""
+    require_backend()
+    return await job_queue().submit(req)
+
+@app.get("/v1/concept/jobs/{job_id}", response_model=JobStatus, response_model_exclude_unset=True)
+async def job_status(job_id: str):
+    """Status with a running tally of the ballots in so far."""
+    status = await job_queue().status(job_id)
+    if status is None:
+        raise HTTPException(404, f"Unknown job {job_id}")
+    return status
+
+@app.get("/v1/concept/jobs/{job_id}/result", response_model=VoteResponse, response_model_exclude_unset=True)
+async def job_result(job_id: str, view: VoterView = Depends(voter_view), accept: Optional[str] = Header(None)):
+    check_accept(accept)
+    jobs = job_queue()
+    resp = await jobs.result(job_id)
+    if resp is None:
+        status = await jobs.status(job_id)
+        if status is None:
+            raise HTTPException(404, f"Unknown job {job_id}")
+        raise HTTPException(409, f"Job {job_id} is {status.status}" + (f": {status.error}" if status.error else ""))
+    return encode_response(apply_view(resp, view), accept)
+
+@app.get("/v1/concept/runs/{run_id}/tally", response_model=RetallyResponse)
+def retally(run_id: str, rule: Optional[Rule] = None):
+    """Re-count a stored run's ballots under one rule, or every rule when none is given."""
+    store = get_run_store()
+    found = store.load_ballots(run_id) if store else None
+    if found is None:
+        raise HTTPException(404, f"Unknown run {run_id}")
+    req, selections = found
+    results = []
+    for r in ([rule] if rule else RULES):
+        tallies, winners, winner = aggregate(r, req.options, selections)
+        results.append(RuleResult(rule=r, winner=winner, winners=winners, tallies=tallies))
+    return RetallyResponse(run_id=run_id, question=req.question, options=req.options,
+                           mode=req.mode, sample=len(selections), results=results)
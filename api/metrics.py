@@ -0,0 +1,126 @@
+"""Stage timings and counters for vote runs, per run and process-wide.
+
+Each run's stats dict (vote.new_stats) collects seconds per stage under
+"timings" and the latency of every LLM call; build_response turns those
+into `details.timings` and `details.llm_latency_s`. The same observations
+feed process-wide counters and histograms, rendered in the Prometheus text
+format on GET /metrics. Stage times are summed over concurrent work, so
+`llm_wait` can exceed the wall time of `poll`.
+"""
+import threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _labels(names:Sequence[str], values:Tuple[str, ...]) -> str:
+    if not names: return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name:str, help:str, labels:Sequence[str]=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount:float=1.0, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            lines += [f"{self.name}{_labels(self.labels, k)} {v:g}" for k, v in sorted(self.values.items())]
+        return lines
+
+class Histogram:
+    def __init__(self, name:str, help:str, labels:Sequence[str]=(), buckets:Sequence[float]=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, tuple(labels), tuple(buckets)
+        self.values: Dict[Tuple[str, ...], list] = {}     # labels -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value:float, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labels)
+        with self.lock:
+            row = self.values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            row[bisect_left(self.buckets, value)] += 1
+            row[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, row in sorted(self.values.items()):
+                names, total = self.labels + ("le",), 0
+                for le, n in zip(self.buckets + ("+Inf",), row[:-1]):
+                    total += n
+                    lines.append(f"{self.name}_bucket{_labels(names, key + (f'{le:g}' if le != '+Inf' else le,))} {total}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {row[-1]:g}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {total}")
+        return lines
+
+RUNS = Counter("vote_runs_total", "Panels tallied.")
+EVENTS = Counter("vote_events_total", "Per-voter and per-call events (fallbacks, parse failures, cache hits, retries, ...).", ["event"])
+TOKENS = Counter("vote_llm_tokens_total", "Tokens reported by the LLM backend.", ["kind"])
+STAGE_SECONDS = Histogram("vote_stage_seconds", "Time spent per stage of a vote run.", ["stage"])
+LLM_CALL_SECONDS = Histogram("vote_llm_call_seconds", "Latency of single LLM calls.", ["outcome"])
+REGISTRY = (RUNS, EVENTS, TOKENS, STAGE_SECONDS, LLM_CALL_SECONDS)
+TOKEN_KINDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+def add_time(stats:Optional[dict], stage:str, seconds:float) -> None:
+    if stats is not None:
+        stats["timings"][stage] = stats["timings"].get(stage, 0.0) + seconds
+
+def observe_stage(stats:Optional[dict], stage:str, seconds:float) -> None:
+    add_time(stats, stage, seconds)
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+@contextmanager
+def span(stats:Optional[dict], stage:str):
+    """Time the block into the run's stats and the process-wide stage histogram."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stats, stage, time.perf_counter() - t0)
+
+def observe_call(stats:Optional[dict], seconds:float, outcome:str) -> None:
+    if stats is not None and outcome == "ok":
+        stats["llm_latencies"].append(seconds)
+    LLM_CALL_SECONDS.observe(seconds, outcome=outcome)
+
+def latency_summary(latencies:List[float]) -> dict:
+    """Count, mean, percentiles and a bucket histogram of one run's LLM call latencies (seconds)."""
+    if not latencies:
+        return {"count": 0}
+    xs = sorted(latencies)
+    pct = lambda q: round(xs[min(len(xs) - 1, int(q * len(xs)))], 4)
+    hist = [0] * (len(LATENCY_BUCKETS) + 1)
+    for x in xs:
+        hist[bisect_left(LATENCY_BUCKETS, x)] += 1
+    return {"count": len(xs), "mean": round(sum(xs) / len(xs), 4), "p50": pct(0.5), "p95": pct(0.95),
+            "p99": pct(0.99), "max": round(xs[-1], 4),
+            "histogram": {f"le_{b:g}": n for b, n in zip(LATENCY_BUCKETS + (float("inf"),), hist) if n}}
+
+def record_run(stats:dict) -> dict:
+    """Fold a finished run into the process-wide metrics; returns the stats as they go into details."""
+    RUNS.inc()
+    out = {}
+    for k, v in stats.items():
+        if k == "timings":
+            out[k] = {s: round(t, 4) for s, t in v.items()}
+        elif k == "llm_latencies":
+            out["llm_latency_s"] = latency_summary(v)
+        else:
+            out[k] = v
+            if not isinstance(v, int) or not v:
+                continue
+            if k in TOKEN_KINDS:
+                TOKENS.inc(v, kind=k[:-len("_tokens")])
+            else:
+                EVENTS.inc(v, event=k)
+    return out
+
+def render() -> str:
+    return "\n".join(line for m in REGISTRY for line in m.render()) + "\n"
@@ -4,18 +4,27 @@ from typing import List, Literal, Optional, Dict
 Mode = Literal["forced_choice","approval","ranking"]
 Rule = Literal["plurality","approval","borda","condorcet"]
 PersonaSource = Literal["synthetic","personahub","genz_synthetic"]
+PromptLayout = Literal["shared_prefix","persona_first"]
 
-class VoteRequest(BaseModel):
-    question: str = Field(..., min_length=5, description="e.g., Which color for the new drink brand?")
-    brief: str = Field(..., min_length=40, description="Brand/product brief, target audience, constraints.")
-    options: List[str] = Field(..., min_items=2, description="Choice labels, e.g., ['Yellow','Red','Blue']")
-    mode: Mode = "forced_choice"
-    rule: Rule = "plurality"
+class PanelSpec(BaseModel):
+    """Who votes and how they are polled; shared by single and batch requests."""
     n_voters: conint(ge=5, le=500) = 100
     persona_source: PersonaSource = "synthetic"
     persona_filter: Optional[str] = None    # if using PersonaHub
     temperature: float = 0.6
+    model: Optional[str] = Field(None, min_length=1, description="LLM model; default: the server's MODEL.")
     seed: Optional[int] = None
+    concurrency: Optional[conint(ge=1, le=128)] = None   # max parallel LLM calls; default VOTE_CONCURRENCY
+    deadline_s: Optional[float] = Field(None, gt=0, description="Panel deadline; late voters get the fallback ballot.")
+    use_cache: bool = True    # replay cached voter responses for identical prompts; seeded panels only
+    bootstrap: conint(ge=0, le=20000) = 1000   # resamples for win probabilities / CIs; 0 disables
+    ci_level: float = Field(0.95, gt=0, lt=1)
+    prompt_layout: PromptLayout = "shared_prefix"   # shared_prefix: persona last, so voters share a cacheable prefix
+    voters_per_call: conint(ge=1, le=20) = 1   # >1 packs that many personas into one LLM call
+    early_stop: bool = False          # poll in batches and stop once the winner is settled
+    batch_size: conint(ge=5, le=500) = 50
+    min_voters: conint(ge=1) = 30     # early_stop never ends a panel with fewer ballots than this
+    stop_confidence: float = Field(0.99, gt=0.5, lt=1, description="Confidence in the leader needed to stop early (see stability.is_decided).")
 
     @field_validator("temperature")
     @classmethod
@@ -23,12 +32,62 @@ class VoteRequest(BaseModel):
         if not (0.0 <= v <= 1.0): raise ValueError("temperature must be in [0,1]")
         return v
 
+class VoteRequest(PanelSpec):
+    question: str = Field(..., min_length=5, description="e.g., Which color for the new drink brand?")
+    brief: str = Field(..., min_length=40, description="Brand/product brief, target audience, constraints.")
+    options: List[str] = Field(..., min_items=2, description="Choice labels, e.g., ['Yellow','Red','Blue']")
+    mode: Mode = "forced_choice"
+    rule: Rule = "plurality"
+
+class SweepRequest(VoteRequest):
+    """One question, one persona panel, polled under every (model, temperature) pair."""
+    models: List[str] = Field(..., min_items=1, max_items=6)
+    temperatures: List[float] = Field(..., min_items=1, max_items=6)
+
+    @field_validator("temperatures")
+    @classmethod
+    def _temps_range(cls, v):
+        if not all(0.0 <= t <= 1.0 for t in v): raise ValueError("temperatures must be in [0,1]")
+        return v
+
+    def requests(self) -> List[VoteRequest]:
+        """One VoteRequest per grid cell, models outer, temperatures inner."""
+        base = self.model_dump(exclude={"models","temperatures","model","temperature"})
+        return [VoteRequest(**base, model=m, temperature=t) for m in self.models for t in self.temperatures]
+
+class BatchQuestion(BaseModel):
+    question: str = Field(..., min_length=5)
+    options: List[str] = Field(..., min_items=2)
+    mode: Mode = "forced_choice"
+    rule: Rule = "plurality"
+    brief: Optional[str] = Field(None, min_length=40, description="Overrides the batch brief for this question.")
+
+class BatchVoteRequest(PanelSpec):
+    brief: str = Field(..., min_length=40, description="Brand/product brief shared by every question.")
+    questions: List[BatchQuestion] = Field(..., min_items=1, max_items=100)
+
+    def requests(self) -> List[VoteRequest]:
+        """One VoteRequest per question, all with this batch's panel settings."""
+        panel = self.model_dump(include=set(PanelSpec.model_fields))
+        return [VoteRequest(**panel, brief=q.brief or self.brief, question=q.question,
+                            options=q.options, mode=q.mode, rule=q.rule) for q in self.questions]
+
 class VoterResult(BaseModel):
-    id: str
-    selection: List[str]             # forced_choice: [best]; approval: [approved...]; ranking: full order
+    # defaults only so a field-selected response (?fields=...) can leave fields out
+    id: str = ""
+    selection: List[str] = []        # forced_choice: [best]; approval: [approved...]; ranking: full order
     scores: Dict[str, float] = {}    # per-option 0..1 utility (optional)
-    justification: str
-    confidence: float                # 0..1
+    justification: str = ""
+    confidence: float = 0.0          # 0..1
+
+VoterField = Literal["id","selection","scores","justification","confidence"]
+
+class VoterView(BaseModel):
+    """Which voters a response carries: none (summary), a page of them, and which fields."""
+    summary: bool = False
+    offset: conint(ge=0) = 0
+    limit: Optional[conint(ge=0)] = None
+    fields: Optional[List[VoterField]] = None
 
 class VoteResponse(BaseModel):
     question: str
@@ -39,7 +98,62 @@ class VoteResponse(BaseModel):
     generated_at: str
     winner: Optional[str] = None
     winners: Optional[List[str]] = None
-    tallies: Dict[str, float]
+    tallies: Dict[str, object]       # condorcet: {"pairwise": {a: {b: wins}}}
     details: Dict[str, object]
     voters: List[VoterResult]
+    run_id: Optional[str] = None     # pass to /v1/concept/runs/{run_id}/tally to re-count
     notes: Optional[str] = None
+
+class RuleResult(BaseModel):
+    rule: Rule
+    winner: Optional[str] = None
+    winners: List[str]
+    tallies: Dict[str, object]
+
+class RetallyResponse(BaseModel):
+    run_id: str
+    question: str
+    options: List[str]
+    mode: Mode
+    sample: int
+    results: List[RuleResult]
+
+class BatchVoteResponse(BaseModel):
+    sample: int                      # personas in the shared panel
+    generated_at: str
+    results: List[VoteResponse]      # one per question, in request order
+
+JobState = Literal["queued","running","done","failed"]
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: JobState
+    done: int = 0                    # ballots in so far (checkpointed or in flight)
+    total: int
+    tallies: Dict[str, object] = {}  # running tally of the ballots so far
+    winners: List[str] = []
+    winner: Optional[str] = None
+    run_id: Optional[str] = None     # set once done
+    error: Optional[str] = None
+
+class SweepCell(BaseModel):
+    model: str
+    temperature: float
+    winner: Optional[str] = None
+    winners: List[str]
+    tallies: Dict[str, object]
+    details: Dict[str, object]
+    run_id: Optional[str] = None     # the cell's ballots, for re-tally
+
+class SweepResponse(BaseModel):
+    question: str
+    options: List[str]
+    rule: Rule
+    mode: Mode
+    sample: int                      # personas in the shared panel
+    generated_at: str
+    cells: List[SweepCell]           # models outer, temperatures inner
+    columns: List[str]               # "model@temperature", one per cell
+    matrix: Dict[str, List[float]]   # option -> its tally in each column (condorcet: pairwise wins)
+    consensus: Optional[str] = None  # most frequent cell winner
+    agreement: float                 # share of cells whose winner is the consensus
@@ -0,0 +1,134 @@
+"""Local, indexed snapshot of PersonaHub.
+
+`personahub_panel` used to stream the dataset from the Hub on every
+request and scan rows until it had enough matches. Ingest it once instead:
+
+    python -m api.persona_index [--limit N]
+
+which writes PERSONAHUB_PATH (default .cache/personahub/):
+
+    text.bin        UTF-8 persona texts, back to back (memory-mapped)
+    offsets.npy     int64 start of each row in text.bin (n+1 entries)
+    relevance.npy   int8 genz_relevance score per row
+    postings.npy    int32 row ids, grouped by token
+    vocab.json      token -> [start, end) slice of postings.npy
+
+A keyword filter matches like the streaming scan: anywhere in the text,
+ignoring case, so "gam" finds "gaming". Each word of the filter is looked
+up in the vocabulary as a part of a token; the union of those tokens'
+postings gives the candidate rows. Filters that are more than one plain
+word are then checked as a phrase against candidate texts only. Panel
+selection otherwise reproduces the streaming scan: same rows, ids and order.
+"""
+import os, re, json, argparse
+from collections import defaultdict
+from typing import List, Optional
+import numpy as np
+from .personas import GENZ_KEYWORDS
+
+PERSONAHUB_PATH = os.getenv("PERSONAHUB_PATH", ".cache/personahub")
+
+def tokens(text:str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def genz_relevance(text_lower:str) -> int:
+    return sum(1 for kw in GENZ_KEYWORDS if kw in text_lower)
+
+def ingest(path:str=PERSONAHUB_PATH, limit:Optional[int]=None) -> int:
+    """Download PersonaHub once and write the snapshot; returns the number of rows."""
+    from datasets import load_dataset
+    ds = load_dataset("proj-persona/PersonaHub","persona",split="train",streaming=True)
+    os.makedirs(path, exist_ok=True)
+    offsets, relevance, postings = [0], [], defaultdict(list)
+    with open(os.path.join(path, "text.bin.tmp"), "wb") as f:
+        for i, row in enumerate(ds):
+            if limit is not None and i >= limit: break
+            txt = row.get("persona") or str(row)
+            blob = txt.encode("utf-8")
+            f.write(blob)
+            offsets.append(offsets[-1] + len(blob))
+            relevance.append(genz_relevance(txt.lower()))
+            for t in set(tokens(txt)):
+                postings[t].append(i)
+    vocab, flat, pos = {}, [], 0
+    for t, rows in postings.items():
+        vocab[t] = [pos, pos + len(rows)]
+        flat.extend(rows); pos += len(rows)
+    np.save(os.path.join(path, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+    np.save(os.path.join(path, "relevance.npy"), np.asarray(relevance, dtype=np.int8))
+    np.save(os.path.join(path, "postings.npy"), np.asarray(flat, dtype=np.int32))
+    with open(os.path.join(path, "vocab.json"), "w") as f:
+        json.dump(vocab, f)
+    os.replace(os.path.join(path, "text.bin.tmp"), os.path.join(path, "text.bin"))   # marks the snapshot complete
+    return len(relevance)
+
+class PersonaIndex:
+    def __init__(self, path:str=PERSONAHUB_PATH):
+        self.text = np.memmap(os.path.join(path, "text.bin"), dtype=np.uint8, mode="r") \
+            if os.path.getsize(os.path.join(path, "text.bin")) else np.zeros(0, dtype=np.uint8)
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.relevance = np.load(os.path.join(path, "relevance.npy"), mmap_mode="r")
+        self.postings = np.load(os.path.join(path, "postings.npy"), mmap_mode="r")
+        with open(os.path.join(path, "vocab.json")) as f:
+            self.vocab = json.load(f)
+
+    def __len__(self):
+        return len(self.relevance)
+
+    def row_text(self, i:int) -> str:
+        return bytes(self.text[self.offsets[i]:self.offsets[i+1]]).decode("utf-8")
+
+    def candidates(self, keyword:Optional[str]) -> tuple[np.ndarray, Optional[str]]:
+        """Rows with a token containing each word of `keyword`, in dataset order, plus the
+        phrase still to check against their text (None when the token match is already exact)."""
+        if not keyword:
+            return np.arange(len(self)), None
+        words = set(tokens(keyword))
+        if not words:
+            return np.zeros(0, dtype=np.int64), None
+        rows = None
+        for w in words:
+            hits = [self.postings[a:b] for t, (a, b) in self.vocab.items() if w in t]
+            if not hits:
+                return np.zeros(0, dtype=np.int64), None
+            found = np.unique(np.concatenate(hits))
+            rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+        kw = keyword.lower()
+        return np.sort(rows), (None if [kw] == list(words) else kw)
+
+    def panel(self, n:int, keyword:Optional[str]=None) -> List[dict]:
+        """Same personas, ids and order as the streaming personahub_panel scan."""
+        rows, phrase = self.candidates(keyword)
+        h = n // 2   # the scan keeps any row until it has n//2, then only Gen Z relevant ones
+        if phrase is None:
+            rest = rows[h:]
+            chosen = np.concatenate([rows[:h], rest[self.relevance[rest] > 0][:n - h]])
+        else:
+            chosen = []
+            for i in rows:
+                if len(chosen) >= h and self.relevance[i] == 0: continue   # skip before decoding text
+                if phrase in self.row_text(i).lower(): chosen.append(i)
+                if len(chosen) >= n: break
+        res = [{"id": f"PH{j:03d}", "persona_text": self.row_text(i),
+                "genz_relevance": int(self.relevance[i]), "source": "PersonaHub"} for j, i in enumerate(chosen)]
+        res.sort(key=lambda x: x.get("genz_relevance", 0), reverse=True)
+        if not res:   # fallback to unfiltered
+            res = [{"id": f"PH{j:03d}", "persona_text": self.row_text(j),
+                    "genz_relevance": 0, "source": "PersonaHub"} for j in range(min(n, len(self)))]
+        return res[:n]
+
+_index = None
+
+def get_index() -> Optional[PersonaIndex]:
+    """The local snapshot, or None when it has not been ingested."""
+    global _index
+    if _index is None and os.path.exists(os.path.join(PERSONAHUB_PATH, "text.bin")):
+        _index = PersonaIndex(PERSONAHUB_PATH)
+    return _index
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Ingest PersonaHub into a local indexed snapshot.")
+    ap.add_argument("--path", default=PERSONAHUB_PATH)
+    ap.add_argument("--limit", type=int, default=None, help="only the first N rows")
+    args = ap.parse_args()
+    print(f"Ingested {ingest(args.path, args.limit)} personas into {args.path}")
@@ -1,6 +1,6 @@
-import random, os
+import itertools
 import numpy as np
-from typing import Optional
+from typing import List, Optional
 
 ARCHETYPES = [
   {"name":"Trendsetter GenZ","age_range":(18,25),"region":"Urban","traits":["bold","playful","novelty-seeking"],"interests":["streetwear","gaming","music festivals"]},
@@ -16,33 +16,85 @@ ARCHETYPES = [
   {"name":"Fashion Forward GenZ","age_range":(18,25),"region":"Urban","traits":["stylish","confident","trend-aware"],"interests":["fashion","beauty","lifestyle","brands"]}
 ]
 
+SOCIAL_PLATFORMS = ["Instagram", "TikTok", "Snapchat", "Twitter", "YouTube"]
+GENZ_INTERESTS = ["streetwear", "gaming", "music", "fitness", "travel", "food", "beauty", "tech"]
+
+class PersonaPool:
+    """Precomputed, array-backed persona source.
+
+    Everything a persona can be is tabulated once: the archetypes, and for
+    Gen Z the ordered pairs of extra interests and platforms. A panel is
+    then a few vectorized draws of row indices from a private
+    numpy Generator - archetypes stratified so each gets n/k personas
+    (the remainder placed at random) - and one dict per persona. Seeded
+    panels are reproducible and never touch global random state.
+    """
+    def __init__(self, prefix:str, archetypes:List[dict], genz:bool=False):
+        self.prefix, self.genz = prefix, genz
+        self.archetypes = archetypes
+        self.age_lo = np.array([a["age_range"][0] for a in archetypes])
+        self.age_hi = np.array([a["age_range"][1] for a in archetypes])
+        self.age_mean = (self.age_lo + self.age_hi) / 2
+        if genz:
+            self.traits = [a["traits"] + ["social-media-savvy", "trend-aware"] for a in archetypes]
+            self.interest_pairs = list(itertools.permutations(GENZ_INTERESTS, 2))
+            self.interests = [[a["interests"] + list(p) for p in self.interest_pairs] for a in archetypes]
+            self.platform_pairs = [list(p) for p in itertools.permutations(SOCIAL_PLATFORMS, 2)]
+
+    def sample(self, n:int, seed:Optional[int]=None) -> List[dict]:
+        rng = np.random.default_rng(seed)
+        k = len(self.archetypes)
+        counts = np.full(k, n // k)
+        counts[rng.choice(k, n % k, replace=False)] += 1
+        arch = rng.permutation(np.repeat(np.arange(k), counts))
+        if not self.genz:
+            ages = np.clip(rng.normal(self.age_mean[arch], 4), self.age_lo[arch], self.age_hi[arch]).astype(int)
+            return [{
+                "id": f"{self.prefix}{i:03d}",
+                "archetype": self.archetypes[a]["name"],
+                "age": int(ages[i]),
+                "region": self.archetypes[a]["region"],
+                "traits": self.archetypes[a]["traits"],
+                "interests": self.archetypes[a]["interests"]
+            } for i, a in enumerate(arch)]
+        ages = rng.integers(18, 26, size=n)
+        interests = rng.integers(0, len(self.interest_pairs), size=n)
+        platforms = rng.integers(0, len(self.platform_pairs), size=n)
+        return [{
+            "id": f"{self.prefix}{i:03d}",
+            "archetype": self.archetypes[a]["name"],
+            "age": int(ages[i]),
+            "region": self.archetypes[a]["region"],
+            "traits": self.traits[a],
+            "interests": self.interests[a][interests[i]],
+            "social_platforms": self.platform_pairs[platforms[i]],
+            "generation": "Gen Z"
+        } for i, a in enumerate(arch)]
+
+GENZ_ARCHETYPES = [a for a in ARCHETYPES if "GenZ" in a["name"] or a["age_range"][0] <= 25]
+POOLS = {
+    "synthetic": PersonaPool("SYN", ARCHETYPES),
+    "genz_synthetic": PersonaPool("GENZ", GENZ_ARCHETYPES, genz=True),
+}
+
 def synthetic_panel(n:int, seed:Optional[int]=None):
-    if seed is not None:
-        random.seed(seed); np.random.seed(seed)
-    out=[]
-    for i in range(n):
-        a = random.choice(ARCHETYPES)
-        age = int(np.clip(np.random.normal(np.mean(a["age_range"]), 4), a["age_range"][0], a["age_range"][1]))
-        out.append({
-            "id": f"SYN{i:03d}",
-            "archetype": a["name"],
-            "age": age,
-            "region": a["region"],
-            "traits": a["traits"],
-            "interests": a["interests"]
-        })
-    return out
+    return POOLS["synthetic"].sample(n, seed)
+
+# Enhanced search for Gen Z personas
+GENZ_KEYWORDS = ["gen z", "gen-z", "18-25", "young adult", "millennial", "social media", "trendy", "bold", "playful", "energetic"]
 
 # Enhanced PersonaHub integration for Gen Z targeting
 def personahub_panel(n:int, keyword:Optional[str]=None):
+    # Served from the local snapshot when it has been ingested (python -m api.persona_index)
+    from .persona_index import get_index
+    index = get_index()
+    if index is not None:
+        return index.panel(n, keyword)
     try:
         from datasets import load_dataset
         ds = load_dataset("proj-persona/PersonaHub","persona",split="train",streaming=True)
         res=[]
         
-        # Enhanced search for Gen Z personas
-        genz_keywords = ["gen z", "gen-z", "18-25", "young adult", "millennial", "social media", "trendy", "bold", "playful", "energetic"]
-        
         for row in ds:
             txt = row.get("persona") or str(row)
             txt_lower = txt.lower()
@@ -52,7 +104,7 @@ def personahub_panel(n:int, keyword:Optional[str]=None):
                 continue
                 
             # Prioritize Gen Z personas
-            genz_score = sum(1 for kw in genz_keywords if kw in txt_lower)
+            genz_score = sum(1 for kw in GENZ_KEYWORDS if kw in txt_lower)
             
             if genz_score > 0:  # Found Gen Z relevant persona
                 res.append({
@@ -100,29 +152,4 @@ def personahub_panel(n:int, keyword:Optional[str]=None):
 # Specialized Gen Z persona generator
 def genz_synthetic_panel(n:int, seed:Optional[int]=None):
     """Generate synthetic Gen Z personas specifically for your target audience"""
-    if seed is not None:
-        random.seed(seed); np.random.seed(seed)
-    
-    genz_archetypes = [a for a in ARCHETYPES if "GenZ" in a["name"] or a["age_range"][0] <= 25]
-    
-    out = []
-    for i in range(n):
-        a = random.choice(genz_archetypes)
-        age = random.randint(18, 25)
-        
-        # Add more Gen Z specific details
-        social_platforms = ["Instagram", "TikTok", "Snapchat", "Twitter", "YouTube"]
-        genz_interests = ["streetwear", "gaming", "music", "fitness", "travel", "food", "beauty", "tech"]
-        
-        out.append({
-            "id": f"GENZ{i:03d}",
-            "archetype": a["name"],
-            "age": age,
-            "region": a["region"],
-            "traits": a["traits"] + ["social-media-savvy", "trend-aware"],
-            "interests": a["interests"] + random.sample(genz_interests, 2),
-            "social_platforms": random.sample(social_platforms, 2),
-            "generation": "Gen Z"
-        })
-    
-    return out
+    return POOLS["genz_synthetic"].sample(n, seed)
@@ -0,0 +1,86 @@
+"""Client-side request and token budgets for LLM calls.
+
+Every panel in the process shares one RateLimiter, so concurrent panels
+together stay under the provider's requests-per-minute (VOTE_RPM) and
+tokens-per-minute (VOTE_TPM) limits instead of each discovering them as
+429s. Both are token buckets holding VOTE_RATE_BURST_S seconds' worth of
+budget. A call reserves one request plus an estimate of its tokens up
+front, and the estimate is settled against the reported usage afterwards.
+A 429 that gets through anyway makes every caller back off, honouring
+Retry-After when the provider sends it, and the call is retried with
+exponential backoff up to VOTE_MAX_RETRIES times.
+"""
+import os, time, random, asyncio, threading
+from typing import Optional
+
+RPM = float(os.getenv("VOTE_RPM","0"))          # 0 = no request budget
+TPM = float(os.getenv("VOTE_TPM","0"))          # 0 = no token budget
+BURST_S = float(os.getenv("VOTE_RATE_BURST_S","10"))
+MAX_RETRIES = int(os.getenv("VOTE_MAX_RETRIES","4"))
+BACKOFF_S = float(os.getenv("VOTE_BACKOFF_S","0.5"))
+BACKOFF_MAX_S = float(os.getenv("VOTE_BACKOFF_MAX_S","20"))
+COMPLETION_TOKENS = 150     # token estimate for one ballot, settled against usage after the call
+
+class TokenBucket:
+    """`rate` units per second, holding at most `capacity`."""
+    def __init__(self, rate:float, capacity:float):
+        self.rate, self.capacity = rate, max(capacity, 1.0)
+        self.level, self.stamp = self.capacity, time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount:float) -> float:
+        """Take `amount` now, going into debt if need be; returns the seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate) - amount
+            self.stamp = now
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount:float) -> None:
+        with self.lock:
+            self.level = min(self.capacity, self.level + amount)
+
+class RateLimiter:
+    def __init__(self, rpm:float=RPM, tpm:float=TPM, burst_s:float=BURST_S):
+        self.requests = TokenBucket(rpm / 60, rpm / 60 * burst_s) if rpm else None
+        self.tokens = TokenBucket(tpm / 60, tpm / 60 * burst_s) if tpm else None
+        self.blocked_until = 0.0
+
+    async def acquire(self, tokens:int) -> bool:
+        """Wait for budget for one call of about `tokens` tokens; True if the call had to wait."""
+        wait = max(self.blocked_until - time.monotonic(),
+                   self.requests.reserve(1) if self.requests else 0.0,
+                   self.tokens.reserve(tokens) if self.tokens else 0.0)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait > 0
+
+    def settle(self, estimated:int, used:int) -> None:
+        if self.tokens: self.tokens.refund(estimated - used)
+
+    def back_off(self, seconds:float) -> None:
+        """Hold every caller for `seconds` after the provider pushed back."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+def estimate_tokens(prompt:str) -> int:
+    return len(prompt) // 4 + COMPLETION_TOKENS
+
+def backoff_delay(attempt:int, retry_after:Optional[float]=None) -> float:
+    """Exponential backoff with jitter, never shorter than the provider's Retry-After."""
+    delay = min(BACKOFF_MAX_S, BACKOFF_S * 2 ** attempt) * random.uniform(0.5, 1.0)
+    return max(delay, retry_after or 0.0)
+
+def retry_after(err:Exception) -> Optional[float]:
+    response = getattr(err, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+_limiter = None
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    global _limiter
+    if _limiter is None and (RPM or TPM):
+        _limiter = RateLimiter()
+    return _limiter
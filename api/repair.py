@@ -0,0 +1,191 @@
+"""Tolerant parsing of voter answers.
+
+A voter's answer is recovered when it can be read with confidence:
+
+    JSON        code fences and prose around the object, trailing commas, smart
+                quotes, Python-style literals, and a truncated tail (a stream
+                cut off mid-answer) are repaired; the complete fields are kept
+    labels      options are matched ignoring case, whitespace and surrounding
+                quotes or punctuation; any other label is unknown, never guessed
+    selection   duplicates dropped; forced_choice keeps the first pick, ranking
+                gets its missing options appended by score, then option order
+    numbers     scores and confidence read from numeric strings, clamped to [0,1]
+
+An answer with no usable selection raises BallotError, so the caller can
+re-ask that voter instead of inventing a ballot. Each function returns the
+repairs it made, which vote.py counts per run.
+"""
+import ast, json, re
+from typing import List, Optional, Tuple
+
+class BallotError(ValueError):
+    """The answer holds no ballot that can be recovered."""
+
+FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+TRAILING_COMMA = re.compile(r",\s*([\]}])")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+CLOSERS = {"{": "}", "[": "]"}
+MAX_CUTS = 32   # truncation points tried before giving up on a cut-off answer
+DECODER = json.JSONDecoder()
+
+def load_json(raw:str) -> Tuple[object, List[str]]:
+    """The JSON value in `raw`, and which repairs it took ([] when it parsed as is)."""
+    try:
+        return json.loads(raw), []
+    except (TypeError, ValueError):
+        if not isinstance(raw, str): raise BallotError("answer is not text")
+    text = TRAILING_COMMA.sub(r"\1", FENCE.sub("", raw.translate(SMART_QUOTES)))
+    starts = _top_level(text)
+    if not starts:
+        raise BallotError("no JSON object in answer")
+    for start in starts:      # prose may hold brackets of its own before the ballot: "Sure [note]: {...}"
+        try:
+            return DECODER.raw_decode(text, start)[0], ["json"]    # the first complete value; prose after it is ignored
+        except ValueError:
+            pass
+    for start in starts:
+        value = _literal(text[start:])
+        if value is not None:
+            return value, ["json"]
+    objects = [i for i in starts if text[i] == "{"] or starts
+    value = _complete_prefix(text[objects[0]:])
+    if value is None:
+        raise BallotError("unrepairable JSON")
+    return value, ["truncated"]
+
+def _top_level(text:str) -> List[int]:
+    """Where each "{" or "[" outside any other bracket or string opens, up to MAX_CUTS of them."""
+    starts, depth, in_string, escaped = [], 0, False, False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped: escaped = False
+            elif ch == "\\": escaped = True
+            elif ch == '"': in_string = False
+        elif ch == '"': in_string = True
+        elif ch in CLOSERS:
+            if depth == 0:
+                starts.append(i)
+                if len(starts) == MAX_CUTS: break
+            depth += 1
+        elif ch in "}]" and depth: depth -= 1
+    return starts
+
+def _literal(text:str) -> Optional[object]:
+    """The Python-style dict or list `text` opens with (single quotes, True/None); None if there is none."""
+    depth, quote, escaped = 0, None, False
+    for i, ch in enumerate(text):
+        if quote:
+            if escaped: escaped = False
+            elif ch == "\\": escaped = True
+            elif ch == quote: quote = None
+        elif ch in "\"'": quote = ch
+        elif ch in CLOSERS: depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0: break
+    else:
+        return None
+    try:
+        value = ast.literal_eval(text[:i + 1])
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, (dict, list)) else None
+
+def _complete_prefix(text:str) -> Optional[object]:
+    """The longest prefix of `text` that parses once its open strings and brackets are closed."""
+    cuts, in_string, escaped = [len(text)], False, False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped: escaped = False
+            elif ch == "\\": escaped = True
+            elif ch == '"': in_string = False
+        elif ch == '"': in_string = True
+        elif ch == ",": cuts.append(i)
+    for cut in sorted(cuts, reverse=True)[:MAX_CUTS]:
+        value = _close(text[:cut])
+        if value is not None: return value
+    return None
+
+def _close(prefix:str) -> Optional[object]:
+    stack, in_string, escaped = [], False, False
+    for ch in prefix:
+        if in_string:
+            if escaped: escaped = False
+            elif ch == "\\": escaped = True
+            elif ch == '"': in_string = False
+        elif ch == '"': in_string = True
+        elif ch in CLOSERS: stack.append(CLOSERS[ch])
+        elif ch in "}]" and stack: stack.pop()
+    tail = '"' if in_string else ""
+    try:
+        return json.loads(prefix.rstrip().rstrip(",:") + tail + "".join(reversed(stack)))
+    except ValueError:
+        return None
+
+def _norm(label:str) -> str:
+    return " ".join(str(label).casefold().strip(" \t\n\"'`.,;:!*-").split())
+
+class LabelMatcher:
+    """Maps free-form labels onto the canonical options."""
+    def __init__(self, options:List[str]):
+        self.options = options
+        self.exact = {o: o for o in options}
+        self.normal = {_norm(o): o for o in options}
+
+    def match(self, label) -> Tuple[Optional[str], bool]:
+        """(option, fuzzy) for `label`, or (None, False) when it names no option."""
+        if isinstance(label, str) and label in self.exact:
+            return label, False
+        key = _norm(label) if isinstance(label, (str, int, float)) else ""
+        option = self.normal.get(key) if key else None
+        return option, option is not None
+
+def _unit(value) -> Optional[float]:
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if x != x else min(1.0, max(0.0, x))
+
+def repair_ballot(out, matcher:LabelMatcher, mode:str) -> Tuple[dict, List[str]]:
+    """A ballot on canonical options for `mode`, and the repairs it took; raises BallotError."""
+    if not isinstance(out, dict):
+        raise BallotError("ballot is not an object")
+    repairs = []
+    selection = out.get("selection")
+    if isinstance(selection, (str, int, float)):
+        selection, repairs = [selection], repairs + ["selection"]
+    if not isinstance(selection, list):
+        raise BallotError("no selection")
+    picked = []
+    for label in selection:
+        option, fuzzy = matcher.match(label)
+        if fuzzy: repairs.append("label")
+        if option is None:
+            repairs.append("unknown_label")
+        elif option in picked:
+            repairs.append("duplicate")
+        else:
+            picked.append(option)
+    if not picked:
+        raise BallotError("no selection among the options")
+    scores = {}
+    raw_scores = out.get("scores")
+    for label, value in (raw_scores.items() if isinstance(raw_scores, dict) else ()):
+        option, fuzzy = matcher.match(label)
+        x = _unit(value)
+        if option is None or x is None: continue
+        if fuzzy or x != value: repairs.append("score")
+        scores[option] = x
+    if mode == "forced_choice" and len(picked) > 1:
+        picked, repairs = picked[:1], repairs + ["forced_choice"]
+    if mode == "ranking" and len(picked) < len(matcher.options):
+        rest = [o for o in matcher.options if o not in picked]
+        picked += sorted(rest, key=lambda o: -scores.get(o, -1.0))   # stable: unscored keep option order
+        repairs.append("ranks")
+    ballot = {"selection": picked, "scores": scores, "justification": str(out.get("justification") or "")}
+    confidence = _unit(out.get("confidence"))
+    if confidence is not None:
+        if confidence != out.get("confidence"): repairs.append("confidence")
+        ballot["confidence"] = confidence
+    return ballot, repairs
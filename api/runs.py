@@ -0,0 +1,58 @@
+"""Persistent store of finished panels, so their ballots can be re-tallied.
+
+Each run is saved under a random run ID with its request and the bare
+selections: re-counting under another rule only has to decode that list,
+never call the LLM again. Voters themselves are not kept; they were only
+ever returned with the response.
+"""
+import os, json, time, uuid
+from typing import List, Optional
+from .models import VoteRequest
+from .ballots import BallotTable
+from .storage import sqlite_connect
+
+RUNS_PATH = os.getenv("VOTE_RUNS_PATH", ".cache/runs.sqlite3")   # "" disables run storage
+RUNS_MAX = int(os.getenv("VOTE_RUNS_MAX","5000"))
+
+def new_run_id() -> Optional[str]:
+    return uuid.uuid4().hex if RUNS_PATH else None
+
+class RunStore:
+    def __init__(self, path:str=RUNS_PATH, max_runs:int=RUNS_MAX):
+        self.path, self.max_runs = path, max_runs
+        with sqlite_connect(path, create=True) as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY, created REAL NOT NULL,
+                request TEXT NOT NULL, selections TEXT NOT NULL)""")
+            # databases from before voters were dropped still have the NOT NULL column
+            self.legacy = "voters" in {row[1] for row in db.execute("PRAGMA table_info(runs)")}
+            db.execute("CREATE INDEX IF NOT EXISTS runs_created ON runs(created)")
+
+    def save(self, run_id:str, req:VoteRequest, ballots:BallotTable) -> None:
+        selections = json.dumps(ballots.selections(), ensure_ascii=False)
+        row = (run_id, time.time(), req.model_dump_json(), selections)
+        with sqlite_connect(self.path) as db:
+            if self.legacy:
+                db.execute("INSERT OR REPLACE INTO runs VALUES (?,?,?,?,'[]')", row)
+            else:
+                db.execute("INSERT OR REPLACE INTO runs (run_id, created, request, selections) VALUES (?,?,?,?)", row)
+            db.execute("""DELETE FROM runs WHERE run_id IN (
+                SELECT run_id FROM runs ORDER BY created DESC LIMIT -1 OFFSET ?)""", (self.max_runs,))
+
+    def load_ballots(self, run_id:str) -> Optional[tuple[VoteRequest, List[List[str]]]]:
+        with sqlite_connect(self.path) as db:
+            row = db.execute("SELECT request, selections FROM runs WHERE run_id=?", (run_id,)).fetchone()
+        if row is None: return None
+        return VoteRequest.model_validate_json(row[0]), json.loads(row[1])
+
+_store = None
+
+def get_run_store() -> Optional[RunStore]:
+    global _store
+    if _store is None and RUNS_PATH:
+        _store = RunStore()
+    return _store
+
+def save_run(run_id:Optional[str], req:VoteRequest, ballots:BallotTable) -> None:
+    store = get_run_store()
+    if store and run_id: store.save(run_id, req, ballots)
@@ -0,0 +1,46 @@
+"""Response encoders for the vote endpoints.
+
+JSON responses are left to FastAPI's `response_model` encoding, which
+bench/serialization.py measured as fast as a hand-built Response once
+both apps carry the same middleware and dependencies. Plain event dicts
+on the stream go through orjson when it is installed. Clients that send
+`Accept: application/msgpack` get MessagePack, which needs the optional
+`msgpack` package.
+"""
+import json
+from typing import Any, Optional, Union
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+def dumps(obj:Any) -> bytes:
+    """Compact JSON bytes for plain data (dicts, lists, numbers, strings)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",",":")).encode("utf-8")
+
+def wants_msgpack(accept:Optional[str]) -> bool:
+    return bool(accept) and any(t in accept for t in MSGPACK_TYPES)
+
+def check_accept(accept:Optional[str]) -> None:
+    """Fail fast, before any LLM work, when the client wants an encoding we cannot produce."""
+    if wants_msgpack(accept) and msgpack is None:
+        raise HTTPException(406, "MessagePack responses need the 'msgpack' package on the server")
+
+def encode_response(model:BaseModel, accept:Optional[str]=None) -> Union[BaseModel, Response]:
+    """MessagePack when the client asks for it; otherwise the model, for the route's response_model to encode."""
+    if wants_msgpack(accept):
+        check_accept(accept)
+        return Response(msgpack.packb(model.model_dump(mode="json", exclude_unset=True)), media_type="application/msgpack")
+    return model
@@ -0,0 +1,98 @@
+"""Sampling-noise estimates for a finished panel.
+
+The bootstrap redraws the panel's ballots with replacement and re-counts
+every resample on the array engine: each resample is one row of a
+(B x n) weight matrix, so all B tallies come out of a matrix product
+instead of B Python tally calls.
+"""
+from statistics import NormalDist
+from typing import Dict, List, Optional
+import numpy as np
+from .tally_np import ballot_points, pairwise, condorcet_winners
+
+CHUNK = 2000   # resamples per batch; bounds the weight matrix at CHUNK x n
+
+def resample_weights(rng:np.random.Generator, n:int, size:int) -> np.ndarray:
+    """Multiplicity of each ballot in `size` bootstrap resamples of an n-ballot panel."""
+    draws = rng.integers(0, n, size=(size, n), dtype=np.int64 if size*n > 2**31 else np.int32)
+    draws += (np.arange(size, dtype=draws.dtype) * n)[:, None]    # give each resample its own block of bins
+    return np.bincount(draws.ravel(), minlength=size*n).reshape(size, n).astype(np.float32)
+
+def bootstrap(rule:str, options:List[str], ranks:np.ndarray, resamples:int=1000,
+              level:float=0.95, seed:Optional[int]=None) -> Dict[str,object]:
+    """Per-option win probability and a percentile interval over `resamples` bootstrap panels.
+
+    Ties split the win evenly among the tied options. Intervals are on the
+    rule's tally (counts, Borda points) - for Condorcet, on the number of
+    head-to-head contests each option wins; `no_winner` is the share of
+    resamples without a Condorcet winner.
+    """
+    n, m = ranks.shape
+    rng = np.random.default_rng(seed)
+    wins = np.zeros(m)
+    stats, no_winner = [], 0
+    points = None if rule == "condorcet" else ballot_points(rule, ranks).astype(np.float32)
+    for start in range(0, resamples, CHUNK):
+        w = resample_weights(rng, n, min(CHUNK, resamples - start))
+        if points is None:
+            pair = pairwise(ranks, w)
+            mask = condorcet_winners(pair)
+            wins += mask.sum(axis=0)
+            no_winner += int((~mask.any(axis=1)).sum())
+            stats.append((pair > np.swapaxes(pair, -1, -2)).sum(axis=-1))
+        else:
+            totals = w @ points
+            top = totals == totals.max(axis=1, keepdims=True)
+            wins += (top / top.sum(axis=1, keepdims=True)).sum(axis=0)
+            stats.append(totals)
+    stats = np.concatenate(stats)
+    alpha = (1 - level) / 2
+    lo, hi = np.quantile(stats, [alpha, 1 - alpha], axis=0)
+    out = {
+        "resamples": resamples,
+        "level": level,
+        "win_probability": {o: round(float(p), 4) for o,p in zip(options, wins / resamples)},
+        "ci": {o: [round(float(a), 2), round(float(b), 2)] for o,a,b in zip(options, lo, hi)},
+    }
+    if rule == "condorcet":
+        out["no_winner"] = round(no_winner / resamples, 4)
+    return out
+
+def wilson_lower(wins:int, n:int, z:float) -> float:
+    """Lower end of the Wilson score interval for a share of `wins` out of `n`."""
+    if n == 0: return 0.0
+    p, z2 = wins / n, z * z
+    return (p + z2 / (2*n) - z * np.sqrt(p * (1 - p) / n + z2 / (4*n*n))) / (1 + z2 / n)
+
+def head_to_head(rule:str, ranks:np.ndarray, leader:int) -> tuple:
+    """(wins, decisive ballots) of `leader` against its strongest challenger under `rule`.
+
+    Plurality and approval compare what each ballot gives the two options
+    (a first place, an approval); borda and condorcet compare full ranks.
+    The challenger is the option most ballots favour over the leader; ballots
+    that treat the two alike (e.g. a plurality vote for a third option) don't count.
+    """
+    prefs = -ranks if rule in ("borda","condorcet") else ballot_points(rule, ranks)   # higher is better
+    ahead = (prefs > prefs[:, [leader]]).sum(axis=0)
+    ahead[leader] = -1
+    rival = int(ahead.argmax())
+    return int((prefs[:, leader] > prefs[:, rival]).sum()), int((prefs[:, leader] != prefs[:, rival]).sum())
+
+def is_decided(rule:str, options:List[str], ranks:np.ndarray, confidence:float,
+               resamples:int=500, seed:Optional[int]=None, looks:int=1) -> bool:
+    """True once the leader is settled at `confidence`, allowing for `looks` checks over the panel.
+
+    Two conditions must both hold. First, the leader wins at least
+    `confidence` of the bootstrap resamples. Second, the Wilson lower bound
+    of its head-to-head share against its strongest challenger clears 1/2.
+    The bound is the two-sided interval at 1 - (1 - confidence) / looks
+    (Bonferroni over repeated looks). A bootstrap of a few unanimous ballots
+    alone always says 1.0; the bound needs enough voters to back that up.
+    """
+    if len(ranks) == 0: return False
+    wp = bootstrap(rule, options, ranks, resamples, seed=seed)["win_probability"]
+    leader = max(range(len(options)), key=lambda j: wp[options[j]])
+    if wp[options[leader]] < confidence: return False
+    wins, n = head_to_head(rule, ranks, leader)
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / max(looks, 1) / 2)
+    return wilson_lower(wins, n, z) > 0.5
@@ -0,0 +1,26 @@
+"""SQLite plumbing shared by the response cache, run store and job queue.
+
+Each store keeps one database file in WAL mode, so readers in other
+server processes are not blocked by a writer, and opens a short-lived
+connection per operation.
+"""
+import os, sqlite3
+from contextlib import contextmanager
+
+@contextmanager
+def sqlite_connect(path:str, create:bool=False):
+    """A connection to `path` that commits on success and rolls back on error.
+
+    With `create`, the parent directory is made first and the database is
+    switched to WAL; stores pass it once, when they set up their schema.
+    """
+    if create:
+        d = os.path.dirname(path)
+        if d: os.makedirs(d, exist_ok=True)
+    db = sqlite3.connect(path, timeout=30)
+    try:
+        if create: db.execute("PRAGMA journal_mode=WAL")
+        with db:
+            yield db
+    finally:
+        db.close()
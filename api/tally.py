@@ -1,5 +1,6 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 import itertools, math
+from .tally_np import encode_ballots, tally_ranks
 
 def plurality(options:List[str], votes:List[List[str]]) -> tuple[Dict[str,int], List[str]]:
     # votes: each is [top_choice]
@@ -34,10 +35,11 @@ def condorcet(options:List[str], rankings:List[List[str]]) -> tuple[Dict[str,Dic
     # pairwise wins
     idx = {o:i for i,o in enumerate(options)}
     pair = {a:{b:0 for b in options if b!=a} for a in options}
+    m=len(options)
     for r in rankings:
         pos = {o:i for i,o in enumerate(r)}
         for a,b in itertools.permutations(options,2):
-            if pos[a] < pos[b]:
+            if pos.get(a,m) < pos.get(b,m):   # unranked options tie for last
                 pair[a][b]+=1
     # candidate that beats all others
     winners=[]
@@ -45,3 +47,12 @@ def condorcet(options:List[str], rankings:List[List[str]]) -> tuple[Dict[str,Dic
         if all(pair[a][b] > pair[b][a] for b in options if b!=a):
             winners.append(a)
     return pair, winners
+
+RULES = ("plurality","approval","borda","condorcet")
+
+def aggregate(rule:str, options:List[str], selections:List[List[str]]) -> tuple[Dict[str,object], List[str], Optional[str]]:
+    """Apply one counting rule to the panel's selections; returns (tallies, winners, winner).
+
+    Runs on the array engine in tally_np; the loop functions above are the reference.
+    """
+    return tally_ranks(rule, options, encode_ballots(options, selections))
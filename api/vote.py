@@ -1,13 +1,35 @@
-import os, json, random
+import os, json, random, asyncio, time
+from collections import Counter
 from datetime import datetime, timezone
-from typing import List, Dict
-from openai import OpenAI
-from .models import VoteRequest, VoteResponse, VoterResult
+from typing import List, Dict, Optional, Callable, AsyncIterator, Tuple
+from openai import AsyncOpenAI, RateLimitError
+import httpx
+from .models import (VoteRequest, VoteResponse, VoterResult, VoterView, BatchVoteRequest, BatchVoteResponse,
+                     SweepRequest, SweepResponse, SweepCell)
 from .personas import synthetic_panel, personahub_panel, genz_synthetic_panel
-from .tally import plurality, approval, borda, condorcet
+from .tally import aggregate
+from .tally_np import tally_ranks
+from .ballots import BallotTable
+from .stability import bootstrap, is_decided
+from .cache import cache_key, get_cache
+from .runs import new_run_id, save_run
+from .backends import make_backend, cache_namespace
+from .metrics import span, add_time, observe_stage, observe_call, record_run
+from .ratelimit import RateLimiter, get_rate_limiter, estimate_tokens, backoff_delay, retry_after, MAX_RETRIES
+from .repair import BallotError, LabelMatcher, load_json, repair_ballot
+
+OnVoter = Callable[[int, VoterResult], None]   # (persona index, ballot) as each voter finishes
 
 MODEL = os.getenv("MODEL","gpt-4o-mini")
-client = None  # Will be initialized when needed
+CONCURRENCY = int(os.getenv("VOTE_CONCURRENCY","16"))   # max in-flight LLM calls per panel
+aclient = None  # Backend client for the server's event loop; opened at app startup, else lazily
+# Keep-alive pool shared by every panel in the process; size it for concurrent panels x concurrency
+HTTP_MAX_CONNECTIONS = int(os.getenv("VOTE_HTTP_MAX_CONNECTIONS","128"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("VOTE_HTTP_MAX_KEEPALIVE","64"))
+HTTP_KEEPALIVE_S = float(os.getenv("VOTE_HTTP_KEEPALIVE_S","90"))
+HTTP_WARMUP = int(os.getenv("VOTE_HTTP_WARMUP","0"))   # connections to open at startup; 0 = none
+CALL_TIMEOUT_S = float(os.getenv("VOTE_CALL_TIMEOUT_S","120"))   # per LLM call when the panel has no deadline
+PARSE_RETRIES = int(os.getenv("VOTE_PARSE_RETRIES","1"))   # re-asks of a voter whose answer can't be recovered
 
 SYSTEM = (
  "You are a consumer panelist. Use only the provided brand brief and options. "
@@ -15,13 +37,18 @@ SYSTEM = (
  "No web browsing. Return only JSON."
 )
 
-def voter_prompt(persona:dict, brief:str, question:str, options:List[str], mode:str):
-    persona_text = json.dumps(persona, ensure_ascii=False)
-    return f"""
-Persona:
-{persona_text}
+TASK = """Task:
+- Mode = {mode}
+  * forced_choice: pick exactly ONE best option
+  * approval: pick ANY number of acceptable options (>=1)
+  * ranking: rank ALL options from best to worst with no ties
+Also provide:
+- per-option utility scores in [0,1] (subjective)
+- a 1–2 sentence justification grounded in the brief
+- a confidence score in [0,1]"""
 
-Brand Brief:
+def _shared_block(brief:str, question:str, options:List[str], mode:str) -> str:
+    return f"""Brand Brief:
 {brief}
 
 Question: {question}
@@ -29,23 +56,67 @@ Options: {options}
 
 
 
-Task:
-- Mode = {mode}
-  * forced_choice: pick exactly ONE best option
-  * approval: pick ANY number of acceptable options (>=1)
-  * ranking: rank ALL options from best to worst with no ties
-Also provide:
-- per-option utility scores in [0,1] (subjective)
-- a 1–2 sentence justification grounded in the brief
-- a confidence score in [0,1]
+{TASK.format(mode=mode)}"""
+
+def voter_prompt(persona:dict, brief:str, question:str, options:List[str], mode:str, layout:str="persona_first"):
+    """The single-voter prompt.
 
-Return STRICT JSON:
+    `shared_prefix` puts everything every voter has in common first and the
+    persona last, so consecutive calls share a byte-identical prefix that the
+    provider's prompt cache can reuse; `persona_first` is the original layout.
+    """
+    persona_text = json.dumps(persona, ensure_ascii=False)
+    answer = f"""Return STRICT JSON:
 {{
   "selection": ["..."],                # forced_choice: [best]; approval: [accepted...]; ranking: full order
   "scores": {{"{options[0]}":0.0}},
   "justification": "",
   "confidence": 0.0
-}}
+}}"""
+    if layout == "shared_prefix":
+        return f"""{_shared_block(brief, question, options, mode)}
+
+{answer}
+
+Persona:
+{persona_text}
+"""
+    return f"""
+Persona:
+{persona_text}
+
+{_shared_block(brief, question, options, mode)}
+
+{answer}
+"""
+
+def batch_voter_prompt(personas:List[dict], brief:str, question:str, options:List[str], mode:str, layout:str="persona_first"):
+    """One prompt voting for several personas; each must still answer independently."""
+    panel = "\n".join(json.dumps(p, ensure_ascii=False) for p in personas)
+    header = f"Personas ({len(personas)}, one per line - answer for EACH of them independently, as that person):"
+    answer = f"""Return STRICT JSON with exactly one ballot per persona, in the same order:
+{{
+  "ballots": [
+    {{"id": "<persona id>", "selection": ["..."], "scores": {{"{options[0]}":0.0}}, "justification": "", "confidence": 0.0}}
+  ]
+}}"""
+    if layout == "shared_prefix":
+        return f"""{_shared_block(brief, question, options, mode)}
+for every persona.
+
+{answer}
+
+{header}
+{panel}
+"""
+    return f"""
+{header}
+{panel}
+
+{_shared_block(brief, question, options, mode)}
+for every persona.
+
+{answer}
 """
 
 def gen_personas(req:VoteRequest):
@@ -57,73 +128,441 @@ def gen_personas(req:VoteRequest):
         return personahub_panel(req.n_voters, req.persona_filter)
 
 def call_model(prompt:str, temperature:float):
-    global client
-    if client is None:
-        if "OPENAI_API_KEY" not in os.environ:
-            raise ValueError("OPENAI_API_KEY environment variable is required")
-        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    
-    r = client.chat.completions.create(
-        model=MODEL,
-        temperature=temperature,
-        response_format={"type":"json_object"},
-        messages=[{"role":"system","content":SYSTEM},{"role":"user","content":prompt}]
-    )
+    """One blocking call through the configured backend, for scripts; panels use acall_model."""
+    async def _call():
+        async with make_async_client() as c:
+            return await acall_model(c, prompt, temperature)
+    return asyncio.run(_call())
+
+def make_async_client() -> AsyncOpenAI:
+    """The configured backend (see api/backends.py) on a tuned keep-alive pool; retries are left to acall_model."""
+    limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                          keepalive_expiry=HTTP_KEEPALIVE_S)
+    return make_backend(limits=limits)
+
+def get_async_client() -> AsyncOpenAI:
+    global aclient
+    if aclient is None:
+        aclient = make_async_client()
+    return aclient
+
+async def open_client(warmup:int=HTTP_WARMUP) -> AsyncOpenAI:
+    """Create the shared client up front (app startup) and optionally open `warmup` connections.
+
+    Warm-up sends that many concurrent GET /models, so DNS, TCP and TLS are
+    paid before the first panel; the connections then stay in the pool for
+    HTTP_KEEPALIVE_S. A failed warm-up is reported and otherwise ignored.
+    """
+    c = get_async_client()
+    if warmup:
+        results = await asyncio.gather(*(c.models.list() for _ in range(warmup)), return_exceptions=True)
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            print(f"LLM client warm-up: {len(failed)}/{warmup} connections failed ({failed[0]})")
+    return c
+
+async def close_client() -> None:
+    global aclient
+    if aclient is not None:
+        c, aclient = aclient, None
+        await c.close()
+
+def observe_wait(usage:dict, seconds:float, outcome:str) -> None:
+    """One LLM call's latency by outcome, also counted into the `llm_wait` stage."""
+    observe_call(usage, seconds, outcome)
+    observe_stage(usage, "llm_wait", seconds)
+
+async def acall_model(client:AsyncOpenAI, prompt:str, temperature:float, timeout:Optional[float]=None,
+                      usage:Optional[Dict[str,int]]=None, limiter:Optional[RateLimiter]=None,
+                      model:Optional[str]=None):
+    """One chat completion under the shared rate limiter, retried with backoff on 429s.
+
+    `usage` (a stats dict) collects token counts plus `throttled` (calls the
+    limiter held back) and `rate_limited` / `retries` (429s and re-sends).
+    Without a `timeout` each call gets CALL_TIMEOUT_S; the SDK reads an
+    explicit None as no timeout at all.
+    """
+    timeout = CALL_TIMEOUT_S if timeout is None else timeout
+    usage = usage if usage is not None else new_stats()
+    limiter = limiter or get_rate_limiter()
+    estimate = estimate_tokens(prompt)
+    for attempt in range(MAX_RETRIES + 1):
+        if limiter:
+            with span(usage, "throttle"):
+                if await limiter.acquire(estimate): usage["throttled"] += 1
+        t0 = time.perf_counter()
+        try:
+            r = await client.chat.completions.create(
+                model=model or MODEL,
+                temperature=temperature,
+                response_format={"type":"json_object"},
+                messages=[{"role":"system","content":SYSTEM},{"role":"user","content":prompt}],
+                timeout=timeout
+            )
+            observe_wait(usage, time.perf_counter() - t0, "ok")
+            break
+        except RateLimitError as e:
+            observe_wait(usage, time.perf_counter() - t0, "rate_limited")
+            usage["rate_limited"] += 1
+            if attempt == MAX_RETRIES: raise
+            delay = backoff_delay(attempt, retry_after(e))
+            if limiter: limiter.back_off(delay)
+            usage["retries"] += 1
+            with span(usage, "backoff"):
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            observe_wait(usage, time.perf_counter() - t0, "cancelled")
+            raise
+        except Exception:
+            observe_wait(usage, time.perf_counter() - t0, "error")
+            raise
+    if getattr(r, "usage", None) is not None:
+        if limiter: limiter.settle(estimate, r.usage.total_tokens or 0)
+        details = getattr(r.usage, "prompt_tokens_details", None)
+        usage["prompt_tokens"] += r.usage.prompt_tokens or 0
+        usage["completion_tokens"] += r.usage.completion_tokens or 0
+        usage["cached_tokens"] += (getattr(details, "cached_tokens", 0) or 0) if details else 0
     return r.choices[0].message.content
 
-def run_vote(req:VoteRequest) -> VoteResponse:
-    personas = gen_personas(req)
-    voters=[]
-    for p in personas:
-        prompt = voter_prompt(p, req.brief, req.question, req.options, req.mode)
+def fallback_ballot(req:VoteRequest) -> dict:
+    return {"selection":[req.options[0]],"scores":{}, "justification":"fallback", "confidence":0.3}
+
+def parse_ballot(raw:str, req:VoteRequest, stats:Optional[Dict[str,int]]=None) -> dict:
+    """The ballot in `raw`, repaired where needed (api/repair.py); raises BallotError when none can be recovered."""
+    out, fixes = load_json(raw)
+    ballot, more = repair_ballot(out, LabelMatcher(req.options), req.mode)
+    if stats is not None and (fixes or more): stats["repaired"] += 1
+    return ballot
+
+def split_batch(raw:str, personas:List[dict], req:VoteRequest, stats:Optional[Dict[str,int]]=None) -> Dict[int,dict]:
+    """Per-persona ballots from a batched response, keyed by position in `personas`.
+
+    Ballots are matched on persona id, or on position when the ids are unusable.
+    Entries that are missing, duplicated or can't be repaired are left out so
+    the caller can re-ask those personas on their own.
+    """
+    out, fixes = load_json(raw)
+    entries = out.get("ballots", []) if isinstance(out, dict) else out
+    entries = [e for e in entries if isinstance(e, dict) and "selection" in e] if isinstance(entries, list) else []
+    ids = [p.get("id") for p in personas]
+    by_id = {}
+    for e in entries:
+        by_id.setdefault(e.get("id"), e)
+    if len(set(ids)) == len(ids) and any(i in by_id for i in ids):
+        matched = {j: by_id[i] for j, i in enumerate(ids) if i in by_id}
+    elif len(entries) == len(personas):
+        matched = dict(enumerate(entries))
+    else:
+        matched = {}
+    matcher, ballots = LabelMatcher(req.options), {}
+    for j, e in matched.items():
+        try:
+            ballots[j], more = repair_ballot(e, matcher, req.mode)
+        except BallotError:
+            continue
+        if stats is not None and (fixes or more): stats["repaired"] += 1
+    return ballots
+
+def new_stats() -> Dict[str,int]:
+    return {"fallbacks":0, "timed_out":0, "cache_hits":0, "cache_misses":0, "stopped_early":0,
+            "llm_calls":0, "batch_retries":0, "prompt_tokens":0, "completion_tokens":0, "cached_tokens":0,
+            "throttled":0, "rate_limited":0, "retries":0, "parse_failures":0, "repaired":0, "parse_retries":0,
+            "timings":{}, "llm_latencies":[]}   # seconds per stage; per-call latencies (see api/metrics.py)
+
+async def poll_voters(client:AsyncOpenAI, personas:List[dict], req:VoteRequest, stats:Dict[str,int],
+                      deadline:Optional[float]=None, on_voter:Optional[OnVoter]=None,
+                      sem:Optional[asyncio.Semaphore]=None) -> BallotTable:
+    """Ask every persona concurrently, at most `concurrency` calls in flight.
+
+    Ballots land in a BallotTable in persona order. Answers are repaired
+    where possible (api/repair.py); a voter whose answer can't be recovered is
+    asked again, up to PARSE_RETRIES times. A voter whose call fails, whose
+    answers stay unrecoverable or who misses the panel deadline gets the
+    fallback ballot.
+    Responses already in the cache are replayed without a call; only seeded
+    panels use the cache, so an unseeded re-run is an independent sample. `on_voter`
+    sees each ballot in completion order. Pass `sem` to draw on a concurrency
+    budget shared with other panels instead.
+    """
+    loop = asyncio.get_running_loop()
+    sem = sem or asyncio.Semaphore(req.concurrency or CONCURRENCY)
+    if deadline is None and req.deadline_s:
+        deadline = loop.time() + req.deadline_s
+    cache = get_cache() if req.use_cache and req.seed is not None else None   # unseeded panels are fresh draws
+    model = req.model or MODEL
+    keys = [cache_key(cache_namespace(model), req.temperature, req.seed, p, req.brief, req.question, req.options, req.mode, req.prompt_layout)
+            for p in personas]
+    with span(stats, "cache"):
+        cached = await asyncio.to_thread(cache.get_many, keys) if cache else {}
+    fresh = {}
+    table = BallotTable(req.options, len(personas))
+
+    def done(i, out):
+        try:
+            with span(stats, "validate"):
+                table.set(i, personas[i].get("id","anon"), out)
+        except Exception:
+            stats["fallbacks"] += 1; stats["parse_failures"] += 1
+            table.set(i, personas[i].get("id","anon"), fallback_ballot(req))
+        if on_voter: on_voter(i, table[i])
+
+    async def ask(prompt):
+        t0 = time.perf_counter()
+        async with sem:
+            observe_stage(stats, "queue", time.perf_counter() - t0)
+            timeout = None if deadline is None else max(deadline - loop.time(), 0.001)
+            stats["llm_calls"] += 1
+            return await acall_model(client, prompt, req.temperature, timeout, stats, model=model)
+
+    def before_deadline(coro):
+        return asyncio.wait_for(coro, None if deadline is None else max(deadline - loop.time(), 0))
+
+    async def cast(i):
+        p = personas[i]
         try:
-            out = json.loads(call_model(prompt, req.temperature))
-            # Validate that all selections are in the original options
-            if "selection" in out and out["selection"]:
-                valid_selections = [s for s in out["selection"] if s in req.options]
-                if not valid_selections:
-                    valid_selections = [req.options[0]]  # Fallback to first option
-                out["selection"] = valid_selections
+            with span(stats, "prompt"):
+                prompt = voter_prompt(p, req.brief, req.question, req.options, req.mode, req.prompt_layout)
+            for attempt in range(PARSE_RETRIES + 1):
+                raw = await before_deadline(ask(prompt))
+                try:
+                    with span(stats, "parse"):
+                        out = parse_ballot(raw, req, stats)
+                    break
+                except BallotError:
+                    stats["parse_failures"] += 1
+                    if attempt == PARSE_RETRIES: raise
+                    stats["parse_retries"] += 1
+            fresh[keys[i]] = json.dumps(out, ensure_ascii=False)
+        except asyncio.TimeoutError:
+            stats["timed_out"] += 1; stats["fallbacks"] += 1
+            out = fallback_ballot(req)
         except Exception:
-            out = {"selection":[req.options[0]],"scores":{}, "justification":"fallback", "confidence":0.3}
-        voters.append(VoterResult(
-            id=p.get("id","anon"),
-            selection=out.get("selection",[]),
-            scores=out.get("scores",{}),
-            justification=out.get("justification",""),
-            confidence=float(out.get("confidence",0.0))
-        ))
-
-    # Aggregate per rule
-    if req.rule == "plurality":
-        tallies, winners = plurality(req.options, [v.selection[:1] for v in voters])
-        winner = winners[0] if len(winners)==1 else None
-        details = {"winners": winners}
-    elif req.rule == "approval":
-        tallies, winners = approval(req.options, [v.selection for v in voters])
-        winner = winners[0] if len(winners)==1 else None
-        details = {"winners": winners}
-    elif req.rule == "borda":
-        tallies, winners = borda(req.options, [v.selection for v in voters])
-        winner = winners[0] if len(winners)==1 else None
-        details = {"winners": winners}
-    else:  # condorcet
-        pair, winners = condorcet(req.options, [v.selection for v in voters])
-        tallies = {"pairwise": pair}
-        winner = winners[0] if winners else None
-        details = {"winners": winners}
+            stats["fallbacks"] += 1
+            out = fallback_ballot(req)
+        done(i, out)
+
+    async def cast_batch(group):
+        group_personas = [personas[i] for i in group]
+        try:
+            with span(stats, "prompt"):
+                prompt = batch_voter_prompt(group_personas, req.brief, req.question, req.options, req.mode, req.prompt_layout)
+            raw = await before_deadline(ask(prompt))
+            try:
+                with span(stats, "parse"):
+                    ballots = split_batch(raw, group_personas, req, stats)
+            except Exception:
+                stats["parse_failures"] += 1
+                raise
+        except asyncio.TimeoutError:
+            for i in group:
+                stats["timed_out"] += 1; stats["fallbacks"] += 1
+                done(i, fallback_ballot(req))
+            return
+        except Exception:
+            ballots = {}
+        retry = []
+        for j, i in enumerate(group):
+            try:
+                with span(stats, "validate"):
+                    table.set(i, personas[i].get("id","anon"), ballots[j])
+            except Exception:     # missing or malformed: ask this persona on its own
+                retry.append(i)
+                continue
+            fresh[keys[i]] = json.dumps(ballots[j], ensure_ascii=False)
+            if on_voter: on_voter(i, table[i])
+        stats["batch_retries"] += len(retry)
+        await asyncio.gather(*(cast(i) for i in retry))
+
+    todo = []
+    for i, key in enumerate(keys):
+        try:
+            out = parse_ballot(cached[key], req) if key in cached else None
+        except BallotError:   # an entry written before answers were repaired
+            out = None
+        if out is None:
+            todo.append(i)
+        else:
+            stats["cache_hits"] += 1
+            done(i, out)
+    if cache: stats["cache_misses"] += len(todo)
+    k = req.voters_per_call
+    if k > 1:
+        await asyncio.gather(*(cast_batch(todo[j:j+k]) for j in range(0, len(todo), k)))
+    else:
+        await asyncio.gather(*(cast(i) for i in todo))
+    if cache:
+        with span(stats, "cache"):
+            await asyncio.to_thread(cache.put_many, fresh)
+    return table
+
+async def poll_panel(client:AsyncOpenAI, personas:List[dict], req:VoteRequest, stats:Dict[str,int],
+                     on_voter:Optional[OnVoter]=None, sem:Optional[asyncio.Semaphore]=None) -> BallotTable:
+    """poll_voters, or in early_stop mode, batches of it until the leader is decided.
+
+    After each batch, once at least `min_voters` ballots are in, the ballots so
+    far are checked with stability.is_decided. Polling stops once the leader
+    is settled at `stop_confidence`, corrected for one look per batch, or
+    when the panel runs out.
+    """
+    if not req.early_stop:
+        return await poll_voters(client, personas, req, stats, on_voter=on_voter, sem=sem)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + req.deadline_s if req.deadline_s else None
+    batches, looks = [], -(-len(personas) // req.batch_size)
+    for start in range(0, len(personas), req.batch_size):
+        batches.append(await poll_voters(client, personas[start:start+req.batch_size], req, stats, deadline,
+                                         on_voter and (lambda i, v, start=start: on_voter(start + i, v)), sem))
+        table = BallotTable.concat(req.options, batches)
+        if req.min_voters <= len(table) < len(personas) and await asyncio.to_thread(
+                is_decided, req.rule, req.options, table.ranks, req.stop_confidence, seed=req.seed, looks=looks):
+            stats["stopped_early"] = 1
+            break
+    return BallotTable.concat(req.options, batches)
+
+async def run_vote_async(req:VoteRequest, on_voter:Optional[OnVoter]=None, view:Optional[VoterView]=None) -> VoteResponse:
+    """Non-blocking run_vote for the server: personas are built off-loop, voters share the app's async client."""
+    personas, persona_s = await timed_personas(req)
+    return await _run_panel(get_async_client(), personas, req, view, on_voter, persona_s=persona_s)
+
+async def timed_personas(req:VoteRequest) -> Tuple[List[dict], float]:
+    """gen_personas off the loop, and how long it took (also observed process-wide)."""
+    t0 = time.perf_counter()
+    personas = await asyncio.to_thread(gen_personas, req)
+    seconds = time.perf_counter() - t0
+    observe_stage(None, "personas", seconds)
+    return personas, seconds
+
+async def _run_panel(client:AsyncOpenAI, personas:List[dict], req:VoteRequest, view:Optional[VoterView]=None,
+                     on_voter:Optional[OnVoter]=None, sem:Optional[asyncio.Semaphore]=None,
+                     persona_s:float=0.0) -> VoteResponse:
+    stats = new_stats()
+    add_time(stats, "personas", persona_s)
+    with span(stats, "poll"):
+        ballots = await poll_panel(client, personas, req, stats, on_voter, sem)
+    resp = await asyncio.to_thread(build_response, req, ballots, stats, new_run_id(), view)   # bootstrap is CPU work
+    await asyncio.to_thread(save_run, resp.run_id, req, ballots)
+    return resp
+
+async def run_batch_async(batch:BatchVoteRequest, view:Optional[VoterView]=None) -> BatchVoteResponse:
+    """Many questions over one panel.
+
+    Personas are generated once; every question's voter calls go through a
+    single semaphore, so the batch as a whole keeps at most `concurrency`
+    calls in flight. Each question gets its own response and stored run.
+    """
+    reqs = batch.requests()
+    personas, persona_s = await timed_personas(reqs[0])
+    client, sem = get_async_client(), asyncio.Semaphore(batch.concurrency or CONCURRENCY)
+    results = await asyncio.gather(*(_run_panel(client, personas, r, view, sem=sem, persona_s=persona_s) for r in reqs))
+    return BatchVoteResponse(sample=len(personas), generated_at=datetime.now(timezone.utc).isoformat(),
+                             results=list(results))
+
+async def stream_vote(req:VoteRequest, tally_every:int=0, view:Optional[VoterView]=None) -> AsyncIterator[dict]:
+    """run_vote_async as a stream of events.
+
+    Yields {"event":"voter"} for every ballot as it completes, a running
+    {"event":"tally"} every `tally_every` ballots (default: ~20 per panel),
+    then {"event":"result"} with the full response, or {"event":"error"}.
+    `view` shapes the result's voter list; its fields (or summary) also
+    apply to the voter events.
+    """
+    view = view or VoterView()
+    include = set(view.fields) if view.fields else None
+    queue = asyncio.Queue()
+    task = asyncio.create_task(run_vote_async(req, on_voter=lambda i, v: queue.put_nowait((i, v)), view=view))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    tally_every = tally_every or max(1, req.n_voters // 20)
+    done = []
+    try:
+        while (item := await queue.get()) is not None:
+            i, v = item
+            done.append(v.selection)
+            event = {"event":"voter", "index":i, "done":len(done), "total":req.n_voters}
+            if not view.summary: event["voter"] = v.model_dump(include=include)
+            yield event
+            if len(done) % tally_every == 0:
+                tallies, winners, winner = aggregate(req.rule, req.options, done)
+                yield {"event":"tally", "done":len(done), "total":req.n_voters,
+                       "tallies":tallies, "winners":winners, "winner":winner}
+        resp = task.result()
+        yield {"event":"result", "response":resp.model_dump(mode="json", exclude_unset=True)}
+    except Exception as e:
+        yield {"event":"error", "detail":str(e)}
+    finally:
+        task.cancel()
+
+async def run_sweep_async(sweep:SweepRequest) -> SweepResponse:
+    """One panel polled under every (model, temperature) pair at once.
+
+    Personas are generated once and all cells share one concurrency budget;
+    each cell is a stored run whose voter responses go through the cache,
+    so repeating a sweep (with a seed) or widening its grid only pays for
+    the new cells.
+    """
+    reqs = sweep.requests()
+    personas, persona_s = await timed_personas(sweep)
+    client, sem = get_async_client(), asyncio.Semaphore(sweep.concurrency or CONCURRENCY)
+    results = await asyncio.gather(*(_run_panel(client, personas, r, VoterView(summary=True), sem=sem, persona_s=persona_s)
+                                     for r in reqs))
+    cells = [SweepCell(model=r.model, temperature=r.temperature, winner=resp.winner, winners=resp.winners or [],
+                       tallies=resp.tallies, details=resp.details, run_id=resp.run_id) for r, resp in zip(reqs, results)]
+    winners = Counter(c.winner for c in cells if c.winner is not None).most_common(1)
+    consensus = winners[0][0] if winners else None
+    return SweepResponse(
+        question=sweep.question, options=sweep.options, rule=sweep.rule, mode=sweep.mode,
+        sample=len(personas), generated_at=datetime.now(timezone.utc).isoformat(), cells=cells,
+        columns=[f"{c.model}@{c.temperature:g}" for c in cells],
+        matrix={o: [_score(c.tallies, o) for c in cells] for o in sweep.options},
+        consensus=consensus, agreement=sum(c.winner == consensus for c in cells) / len(cells) if consensus else 0.0)
+
+def _score(tallies:dict, option:str) -> float:
+    """An option's tally as one number; for condorcet, the pairwise contests it wins."""
+    pair = tallies.get("pairwise")
+    if pair is None:
+        return float(tallies.get(option, 0))
+    return float(sum(v > pair[b][option] for b, v in pair[option].items()))
+
+def run_vote(req:VoteRequest) -> VoteResponse:
+    """Blocking entry point for scripts; runs the panel on a private event loop and client."""
+    async def _run():
+        async with make_async_client() as c:
+            with span(stats, "poll"):
+                return await poll_panel(c, personas, req, stats)
+    stats = new_stats()
+    with span(stats, "personas"):
+        personas = gen_personas(req)
+    ballots = asyncio.run(_run())
+    resp = build_response(req, ballots, stats, new_run_id())
+    save_run(resp.run_id, req, ballots)
+    return resp
+
+def build_response(req:VoteRequest, ballots:BallotTable, stats:Dict[str,int], run_id:Optional[str]=None,
+                   view:Optional[VoterView]=None) -> VoteResponse:
+    view = view or VoterView()
+    with span(stats, "tally"):
+        tallies, winners, winner = tally_ranks(req.rule, req.options, ballots.ranks)
+    details = {"winners": winners, "voters_requested": req.n_voters, "voters_used": len(ballots)}
+    if req.bootstrap and len(ballots):
+        with span(stats, "bootstrap"):
+            details["bootstrap"] = bootstrap(req.rule, req.options, ballots.ranks, req.bootstrap, req.ci_level, req.seed)
+    details.update(record_run(stats))   # also folds the run into /metrics
+    n = len(ballots)
+    details["repair_rate"] = round(stats["repaired"] / n, 4) if n else 0.0
+    details["retry_rate"] = round((stats["parse_retries"] + stats["batch_retries"]) / n, 4) if n else 0.0
 
     return VoteResponse(
         question=req.question,
         options=req.options,
         rule=req.rule,
         mode=req.mode,
-        sample=len(voters),
+        sample=len(ballots),
         generated_at=datetime.now(timezone.utc).isoformat(),
         winner=winner,
         winners=details.get("winners"),
         tallies=tallies,
         details=details,
-        voters=voters,
+        voters=[] if view.summary else ballots.to_voters(
+            view.offset, None if view.limit is None else view.offset + view.limit, view.fields),
+        run_id=run_id,
         notes="Synthetic consumer panel; not representative of real customers."
     )
@@ -7,7 +7,6 @@ import plotly.graph_objects as go
 from datetime import datetime
 import os
 from typing import Dict, Any, List
-import time
 
 # Page config
 st.set_page_config(
@@ -238,6 +237,7 @@ if 'progress' not in st.session_state:
 
 # API configuration
 API = os.getenv("API_BASE", "http://localhost:8001")
+VOTERS_SHOWN = 50
 
 def check_api_health():
     """Check if the API is connected"""
@@ -247,8 +247,8 @@ def check_api_health():
     except:
         return False
 
-def run_vote_test(question, brief, options, mode, rule, n_voters, persona_source, temperature, seed=None):
-    """Run the vote test and return results"""
+def build_payload(question, brief, options, mode, rule, n_voters, persona_source, temperature, seed=None, model=None):
+    """Request body for the vote endpoints"""
     payload = {
         "question": question,
         "brief": brief,
@@ -262,11 +262,32 @@ def run_vote_test(question, brief, options, mode, rule, n_voters, persona_source
     
     if seed:
         payload["seed"] = seed
+    if model:
+        payload["model"] = model
+    return payload
+
+def stream_vote_test(question, brief, options, mode, rule, n_voters, persona_source, temperature, seed=None, model=None):
+    """Run the vote test over the streaming endpoint, yielding events as voters finish"""
+    payload = build_payload(question, brief, options, mode, rule, n_voters, persona_source, temperature, seed, model)
     
     try:
-        response = requests.post(f"{API}/v1/concept/vote", json=payload, timeout=120)
+        # read timeout applies between lines, so long panels are fine as long as voters keep arriving
+        # The Voters tab renders VOTERS_SHOWN voters, so the final result only carries those
+        with requests.post(f"{API}/v1/concept/vote/stream", json=payload, params={"limit": VOTERS_SHOWN},
+                           stream=True, timeout=(10, 120)) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+    except requests.exceptions.RequestException as e:
+        st.error(f"API Error: {str(e)}")
+
+def retally_run(run_id, rule):
+    """Re-count a finished run under another rule (stored ballots, no new LLM calls)"""
+    try:
+        response = requests.get(f"{API}/v1/concept/runs/{run_id}/tally", params={"rule": rule}, timeout=10)
         response.raise_for_status()
-        return response.json()
+        return response.json()["results"][0]
     except requests.exceptions.RequestException as e:
         st.error(f"API Error: {str(e)}")
         return None
@@ -500,28 +521,29 @@ def main():
                 st.session_state.is_running = True
                 st.session_state.progress = 0
                 
-                # Simulate progress
+                # Real progress from the streaming endpoint
                 progress_bar = st.progress(0)
                 status_text = st.empty()
+                partial_chart = st.empty()
+                status_text.text("Generating personas...")
                 
-                for i in range(101):
-                    time.sleep(0.05)
-                    st.session_state.progress = i
-                    progress_bar.progress(i)
-                    if i < 30:
-                        status_text.text("Generating personas...")
-                    elif i < 60:
-                        status_text.text("Running vote simulation...")
-                    elif i < 90:
-                        status_text.text("Aggregating results...")
-                    else:
-                        status_text.text("Finalizing...")
-                
-                # Run actual test
-                results = run_vote_test(
+                results = None
+                for event in stream_vote_test(
                     question, brief, options, mode, rule, 
-                    n_voters, persona_source, temperature, seed
-                )
+                    n_voters, persona_source, temperature, seed, model
+                ):
+                    if event["event"] == "voter":
+                        st.session_state.progress = min(100, int(event["done"] / event["total"] * 100))
+                        progress_bar.progress(st.session_state.progress)
+                        status_text.text(f"Running vote simulation... {event['done']}/{event['total']} voters")
+                    elif event["event"] == "tally" and rule != "condorcet":
+                        leader = event.get("winner") or ", ".join(event.get("winners", []))
+                        status_text.text(f"Running vote simulation... {event['done']}/{event['total']} voters · leading: {leader}")
+                        partial_chart.plotly_chart(create_bar_chart(event["tallies"], "Running Tally"), use_container_width=True)
+                    elif event["event"] == "result":
+                        results = event["response"]
+                    elif event["event"] == "error":
+                        st.error(f"API Error: {event['detail']}")
                 
                 if results:
                     st.session_state.results = results
@@ -568,6 +590,12 @@ def main():
         if st.session_state.results:
             results = st.session_state.results
             
+            # Counting Rule changed after the run: re-count the stored ballots instantly
+            if results.get('run_id') and results.get('rule') != rule:
+                recount = retally_run(results['run_id'], rule)
+                if recount:
+                    results = {**results, **recount}
+            
             # KPI Cards Row
             col_kpi1, col_kpi2, col_kpi3 = st.columns(3)
             
@@ -642,7 +670,7 @@ def main():
                 voters = results.get('voters', [])
                 if voters:
                     # Show first 50 voters
-                    display_voters = voters[:50]
+                    display_voters = voters[:VOTERS_SHOWN]
                     
                     for i, voter in enumerate(display_voters):
                         with st.expander(f"Voter {voter['id']} - {voter['selection'][0] if voter['selection'] else 'No selection'}"):
@@ -661,8 +689,8 @@ def main():
                             
                             st.markdown(f"**Justification:** {voter['justification']}")
                     
-                    if len(voters) > 50:
-                        st.info(f"Showing first 50 of {len(voters)} voters. Use the API directly for full results.")
+                    if results.get('sample', 0) > len(display_voters):
+                        st.info(f"Showing first {len(display_voters)} of {results['sample']} voters. Use the API directly for full results.")
                 else:
                     st.info("No voter data available")
                 
@@ -677,6 +705,7 @@ def main():
                 - **Mode:** {mode.replace('_', ' ').title()}
                 - **Rule:** {rule.title()}
                 - **Persona Source:** {persona_source.replace('_', ' ').title()}
+                - **Model:** {model}
                 - **Temperature:** {temperature}
                 - **Voters:** {n_voters}
                 """)
@@ -0,0 +1,73 @@
+"""Throughput of batched (voters_per_call > 1) vs single-persona voting.
+
+    python -m bench.batch_voting                 # simulated LLM, no network
+    python -m bench.batch_voting --live          # real API, needs OPENAI_API_KEY
+
+The simulated client charges a fixed round-trip latency plus per-token
+costs estimated from prompt and answer length (~4 chars per token), which
+is the trade-off batching plays with: fewer round trips and less repeated
+brief/instructions, but longer answers per call.
+"""
+import argparse, asyncio, json, os, time
+from types import SimpleNamespace
+from api.models import VoteRequest
+from api.vote import gen_personas, poll_voters, new_stats, batch_voter_prompt, voter_prompt
+
+BRIEF = ("Audience: Gen Z, bold and playful; the can must pop on a crowded shelf; "
+         "avoid anything that reads as a diet drink. Premium but not luxury.")
+
+class SimulatedClient:
+    def __init__(self, rtt=0.4, s_per_in_token=0.00002, s_per_out_token=0.01):
+        self.rtt, self.s_in, self.s_out = rtt, s_per_in_token, s_per_out_token
+        self.in_tokens = self.out_tokens = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **kw):
+        prompt = messages[-1]["content"]
+        ids = [json.loads(line)["id"] for line in prompt.splitlines() if line.startswith('{"id"')]
+        ballot = {"selection":["Red","Blue","Yellow"], "scores":{"Red":0.8,"Blue":0.5,"Yellow":0.2},
+                  "justification":"Red pops on shelf and reads bold without diet cues.", "confidence":0.8}
+        if '"ballots"' in prompt:
+            content = json.dumps({"ballots":[dict(ballot, id=i) for i in ids]})
+        else:
+            content = json.dumps(ballot)
+        n_in, n_out = sum(len(m["content"]) for m in messages) // 4, len(content) // 4
+        self.in_tokens += n_in; self.out_tokens += n_out
+        await asyncio.sleep(self.rtt + n_in * self.s_in + n_out * self.s_out)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+async def run(k:int, n:int, concurrency:int, live:bool) -> dict:
+    req = VoteRequest(question="Which color for the new energy drink can?", brief=BRIEF,
+                      options=["Yellow","Red","Blue"], mode="ranking", n_voters=n, seed=7,
+                      concurrency=concurrency, voters_per_call=k, use_cache=False, bootstrap=0)
+    personas = gen_personas(req)
+    stats = new_stats()
+    if live:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    else:
+        client = SimulatedClient()
+    t0 = time.perf_counter()
+    await poll_voters(client, personas, req, stats)
+    wall = time.perf_counter() - t0
+    prompt_chars = (len(batch_voter_prompt(personas[:k], BRIEF, req.question, req.options, req.mode, req.prompt_layout)) / k if k > 1
+                    else len(voter_prompt(personas[0], BRIEF, req.question, req.options, req.mode, req.prompt_layout)))
+    out = {"voters_per_call":k, "voters":n, "wall_s":round(wall, 3), "voters_per_s":round(n / wall, 1),
+           "llm_calls":stats["llm_calls"], "cached_tokens":stats["cached_tokens"], "batch_retries":stats["batch_retries"], "fallbacks":stats["fallbacks"],
+           "prompt_chars_per_voter":round(prompt_chars)}
+    if not live:
+        out.update(in_tokens=client.in_tokens, out_tokens=client.out_tokens)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--voters", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 4, 8])
+    ap.add_argument("--live", action="store_true")
+    args = ap.parse_args()
+    for k in args.k:
+        print(json.dumps(asyncio.run(run(k, args.voters, args.concurrency, args.live))))
+
+if __name__ == "__main__":
+    main()
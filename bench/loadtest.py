@@ -0,0 +1,180 @@
+"""Load test for the vote API: mixed panels against one or more server workers.
+
+    python -m bench.loadtest --workers 1,4 --concurrency 1,4,16 --duration 30 --out load.json
+    python -m bench.loadtest --latency 0.5 --jitter 0.6 --dist lognormal --error-rate 0.02 --malformed-rate 0.05
+    python -m bench.loadtest --target http://localhost:8000 --traffic traffic.jsonl --concurrency 8
+
+Without --target, for each N in --workers it starts bench/mock_llm.py and
+`uvicorn api.main:app --workers N` on free local ports. The API is pointed
+at the stub (VOTE_LLM_BASE_URL), with the response cache and the job queue
+off, so every voter is an LLM call. Traffic is a seeded mix of panel sizes,
+modes and rules, or request bodies replayed from a JSONL file. For each
+level in --concurrency it is sent by that many clients in a closed loop for
+`duration` seconds. Each level reports request latency (p50/p95/p99/max),
+requests and voters per second, HTTP errors, and the fallback, repair and
+retry rates taken from the responses' details.
+"""
+import argparse, asyncio, json, os, random, socket, subprocess, sys, tempfile, time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+import httpx
+from api.metrics import latency_summary
+from bench.mock_llm import DISTRIBUTIONS
+from bench.suite import BRIEF, meta
+
+PANEL_SIZES = (10, 25, 50, 100, 200)
+PANEL_WEIGHTS = (30, 30, 20, 15, 5)
+MODE_RULES = (("forced_choice","plurality"), ("approval","approval"), ("ranking","borda"),
+              ("ranking","condorcet"), ("ranking","plurality"))
+COUNTS = ("fallbacks", "repaired", "parse_retries", "batch_retries", "llm_calls", "retries", "rate_limited")   # summed from details
+QUESTIONS = (("Which color for the new energy drink can?", ["Sunburst Yellow","Electric Red","Deep Ocean Blue","Mint Green"]),
+             ("Which tagline fits the launch?", ["Loud Flavor","Zero Chill","Crack It Open"]),
+             ("Which name should the drink carry?", ["Volt","Fizzbang","Nova","Riot","Glow"]))
+
+def traffic(n:int, seed:int=0) -> List[dict]:
+    """`n` VoteRequest bodies: panel sizes skewed small, every mode with the rules that fit it."""
+    rng = random.Random(seed)
+    bodies = []
+    for i in range(n):
+        question, options = rng.choice(QUESTIONS)
+        mode, rule = rng.choice(MODE_RULES)
+        bodies.append({"question": question, "brief": BRIEF, "options": options, "mode": mode, "rule": rule,
+                       "n_voters": rng.choices(PANEL_SIZES, PANEL_WEIGHTS)[0], "seed": i, "use_cache": False})
+    return bodies
+
+def load_traffic(path:str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+async def drive(client:httpx.AsyncClient, bodies:List[dict], concurrency:int, duration:float,
+                max_requests:Optional[int]=None) -> dict:
+    """`concurrency` clients posting `bodies` round-robin until `duration` runs out (or `max_requests` are sent)."""
+    samples, sent = [], 0
+    stop = time.perf_counter() + duration
+
+    async def user():
+        nonlocal sent
+        while time.perf_counter() < stop and (max_requests is None or sent < max_requests):
+            body = bodies[sent % len(bodies)]
+            sent += 1
+            t0 = time.perf_counter()
+            try:
+                r = await client.post("/v1/concept/vote", params={"summary": "true"}, json=body)
+                status = r.status_code
+                details = r.json().get("details", {}) if status == 200 else {}
+            except httpx.HTTPError:
+                status, details = 0, {}
+            samples.append({"seconds": time.perf_counter() - t0, "status": status, "voters": body.get("n_voters", 30),
+                            **{k: details.get(k, 0) for k in COUNTS}})
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return summarize(samples, time.perf_counter() - t0, concurrency)
+
+def summarize(samples:List[dict], wall:float, concurrency:int) -> dict:
+    ok = [s for s in samples if s["status"] == 200]
+    voters = sum(s["voters"] for s in ok)
+    row = {"concurrency": concurrency, "requests": len(samples), "ok": len(ok), "errors": len(samples) - len(ok),
+           "wall_s": round(wall, 3), "requests_per_s": round(len(ok) / wall, 3) if wall else 0.0,
+           "voters_per_s": round(voters / wall, 1) if wall else 0.0,
+           "latency_s": latency_summary([s["seconds"] for s in ok])}
+    for k in COUNTS:
+        row[k] = sum(s[k] for s in ok)
+    rate = lambda n: round(n / voters, 4) if voters else 0.0
+    row.update(fallback_rate=rate(row["fallbacks"]), repair_rate=rate(row["repaired"]),
+               retry_rate=rate(row["parse_retries"] + row["batch_retries"]))
+    row["error_rate"] = round(row["errors"] / len(samples), 4) if samples else 0.0
+    return row
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_ready(url:str, proc:subprocess.Popen, timeout:float=30.0) -> None:
+    until = time.monotonic() + timeout
+    while time.monotonic() < until:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{' '.join(proc.args)} exited with {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200: return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:g}s")
+
+@contextmanager
+def serve(workers:int, stub_args:List[str]) -> Iterator[str]:
+    """The mock LLM and `workers` API processes on free ports; yields the API's base URL."""
+    llm_port, api_port = free_port(), free_port()
+    procs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, VOTE_LLM_BACKEND="openai_compatible", VOTE_LLM_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+                   VOTE_LLM_API_KEY="mock", VOTE_CACHE_PATH="", VOTE_JOBS_PATH="",
+                   VOTE_RUNS_PATH=os.path.join(tmp, "runs.sqlite3"))
+        try:
+            procs.append(subprocess.Popen([sys.executable, "-m", "bench.mock_llm", "--port", str(llm_port), *stub_args]))
+            wait_ready(f"http://127.0.0.1:{llm_port}/v1/models", procs[-1])
+            procs.append(subprocess.Popen([sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(api_port),
+                                           "--workers", str(workers), "--log-level", "warning"], env=env))
+            wait_ready(f"http://127.0.0.1:{api_port}/healthz", procs[-1])
+            yield f"http://127.0.0.1:{api_port}"
+        finally:
+            for p in reversed(procs):
+                p.terminate()
+                try:
+                    p.wait(10)
+                except subprocess.TimeoutExpired:
+                    p.kill()
+
+async def run_levels(base_url:str, bodies:List[dict], levels:List[int], duration:float, timeout:float) -> List[dict]:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        rows = []
+        for c in levels:
+            rows.append(await drive(client, bodies, c, duration))
+            print(json.dumps(rows[-1]), file=sys.stderr)
+        return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--target", help="base URL of a running API; default: start the stub and API locally")
+    ap.add_argument("--workers", default="1,4", help="comma-separated uvicorn worker counts (ignored with --target)")
+    ap.add_argument("--concurrency", default="1,4,16", help="comma-separated numbers of concurrent clients")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds per concurrency level")
+    ap.add_argument("--traffic", help="JSONL of VoteRequest bodies to replay instead of the generated mix")
+    ap.add_argument("--requests", type=int, default=500, help="size of the generated mix")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--timeout", type=float, default=300.0, help="per-request timeout in seconds")
+    ap.add_argument("--latency", type=float, default=0.3, help="stub latency (median for lognormal)")
+    ap.add_argument("--jitter", type=float, default=0.2, help="uniform: extra seconds on top; lognormal: sigma")
+    ap.add_argument("--dist", choices=DISTRIBUTIONS, default="uniform")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0)
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--rpm", type=float, default=0.0)
+    ap.add_argument("--out", help="write results here instead of stdout")
+    args = ap.parse_args()
+    bodies = load_traffic(args.traffic) if args.traffic else traffic(args.requests, args.seed)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    stub = {"latency": args.latency, "jitter": args.jitter, "dist": args.dist, "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate, "malformed_rate": args.malformed_rate, "rpm": args.rpm}
+    stub_args = [f"--{k.replace('_', '-')}={v}" for k, v in stub.items()] + [f"--seed={args.seed}"]
+    results = []
+    if args.target:
+        for row in asyncio.run(run_levels(args.target, bodies, levels, args.duration, args.timeout)):
+            results.append({"target": args.target, **row})
+    else:
+        for n in (int(w) for w in args.workers.split(",")):
+            with serve(n, stub_args) as url:
+                for row in asyncio.run(run_levels(url, bodies, levels, args.duration, args.timeout)):
+                    results.append({"workers": n, **row})
+    out = json.dumps({"meta": {**meta(args.seed, False), "stub": None if args.target else stub,
+                               "traffic": args.traffic or f"generated:{len(bodies)}"}, "results": results}, indent=1)
+    if args.out:
+        with open(args.out, "w") as f: f.write(out + "\n")
+    else:
+        print(out)
+
+if __name__ == "__main__":
+    main()
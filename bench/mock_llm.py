@@ -0,0 +1,102 @@
+"""OpenAI-compatible chat completions stub, for tests, benchmarks and load tests.
+
+    python -m bench.mock_llm --port 8001 --latency 0.3 --rate-limit-rate 0.1
+    VOTE_LLM_BASE_URL=http://localhost:8001/v1 uvicorn api.main:app
+
+Answers vote prompts (single or batched) with the ballots of the in-process
+mock backend (api/backends.py), which depend only on the persona, seed,
+model and temperature. Every answer reports token usage. It can be made
+slow or flaky. With `dist="uniform"` a call takes `latency` plus up to
+`jitter` seconds; with `dist="lognormal"`, `latency` is the median and
+`jitter` the spread (sigma of the log), which gives the long tail real
+providers have. `rate_limit_rate` and `error_rate` turn that share of calls
+into 429s and 500s, `malformed_rate` answers with truncated JSON, and `rpm`
+puts a server-side request budget in front of everything, like a real
+provider.
+In-process, `mock_client(create_app(...))` reaches it over
+httpx.ASGITransport; no port needed.
+"""
+import argparse, asyncio, random, time
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import httpx
+from openai import AsyncOpenAI
+from api.ratelimit import TokenBucket
+from api.backends import mock_answer
+
+def _error(status:int, kind:str, message:str, headers:Optional[dict]=None) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": kind, "code": kind}}, status, headers=headers)
+
+DISTRIBUTIONS = ("uniform","lognormal")
+
+def create_app(latency:float=0.0, jitter:float=0.0, rate_limit_rate:float=0.0, error_rate:float=0.0,
+               rpm:float=0.0, burst_s:float=1.0, retry_after:Optional[float]=None, seed:int=0,
+               dist:str="uniform", malformed_rate:float=0.0) -> FastAPI:
+    if dist not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown latency distribution {dist!r}; expected one of {', '.join(DISTRIBUTIONS)}")
+    app = FastAPI(title="Mock LLM")
+    app.state.calls = app.state.rate_limited = app.state.errors = app.state.malformed = app.state.model_lists = 0
+    budget = TokenBucket(rpm / 60, rpm / 60 * burst_s) if rpm else None
+    chaos = random.Random(seed)
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else None
+
+    @app.get("/v1/models")
+    async def models():
+        app.state.model_lists += 1
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "created": 0, "owned_by": "mock"}]}
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        over_budget = budget is not None and budget.reserve(1) > 0
+        if over_budget: budget.refund(1)     # a rejected call costs nothing
+        if over_budget or chaos.random() < rate_limit_rate:
+            app.state.rate_limited += 1
+            return _error(429, "rate_limit_exceeded", "Rate limit reached (mock)", headers)
+        if chaos.random() < error_rate:
+            app.state.errors += 1
+            return _error(500, "server_error", "Internal error (mock)")
+        if dist == "lognormal":
+            await asyncio.sleep(latency * chaos.lognormvariate(0.0, jitter))
+        else:
+            await asyncio.sleep(latency + jitter * chaos.random())
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        content = mock_answer(prompt, seed, body.get("model", "mock"), body.get("temperature", 0.0))
+        if chaos.random() < malformed_rate:
+            app.state.malformed += 1
+            content = content[:len(content) // 2]
+        n_in, n_out = len(prompt) // 4, len(content) // 4
+        return {"id": f"mock-{app.state.calls}", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": n_in, "completion_tokens": n_out, "total_tokens": n_in + n_out}}
+
+    return app
+
+def mock_client(app:FastAPI) -> AsyncOpenAI:
+    """An AsyncOpenAI that reaches `app` in-process; retries are left to acall_model, as in api.vote."""
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    return AsyncOpenAI(api_key="mock", base_url="http://mock/v1", http_client=http, max_retries=0)
+
+def main():
+    import uvicorn
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--latency", type=float, default=0.3)
+    ap.add_argument("--jitter", type=float, default=0.2, help="uniform: extra seconds on top; lognormal: sigma")
+    ap.add_argument("--dist", choices=DISTRIBUTIONS, default="uniform")
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--rpm", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    uvicorn.run(create_app(args.latency, args.jitter, args.rate_limit_rate, args.error_rate, args.rpm, seed=args.seed,
+                           dist=args.dist, malformed_rate=args.malformed_rate),
+                port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Encode time and payload size of a vote response, default route vs the fast path.
+
+    python -m bench.serialization [--voters 500] [--repeat 50]
+
+Builds one realistic VoteResponse (random ballots, scores, justifications
+and a bootstrap block) and times:
+  * in-process encoders: jsonable_encoder + json.dumps (the classic FastAPI
+    path), pydantic model_dump_json, orjson, MessagePack;
+  * full HTTP round trips through TestClient for a stock `response_model`
+    route and for api.main's route (JSON and MessagePack). The stock app has
+    api.main's CORS middleware and `voter_view` dependency, so only the
+    response encoding differs.
+"""
+import argparse, json, os, random, statistics, time
+from fastapi import FastAPI, Depends
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+import api.main as main
+from api.ballots import BallotTable
+from api.models import VoteRequest, VoteResponse, VoterView
+from api.serialize import dumps, orjson, msgpack
+from api.vote import build_response, new_stats
+
+def sample_response(n:int) -> tuple[VoteRequest, VoteResponse]:
+    rng = random.Random(0)
+    options = ["Sunburst Yellow", "Electric Red", "Deep Ocean Blue", "Mint Green"]
+    req = VoteRequest(question="Which color for the new energy drink can?", options=options, n_voters=n, mode="ranking",
+                      brief="Audience: Gen Z, bold and playful; the can must pop on a crowded shelf; avoid diet cues.")
+    table = BallotTable(options, n)
+    for i in range(n):
+        order = rng.sample(options, len(options))
+        table.set(i, f"SYN{i:03d}", {"selection": order, "scores": {o: rng.random() for o in options},
+                                     "justification": f"{order[0]} feels bold and stands out on shelf for persona {i}, "
+                                                      "while staying away from the diet-drink look the brief warns about.",
+                                     "confidence": rng.random()})
+    return req, build_response(req, table, new_stats(), "bench")
+
+def timeit(fn, repeat:int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+def main_(voters:int, repeat:int):
+    req, resp = sample_response(voters)
+    rows = []
+    def add(name, fn):
+        out = fn()
+        rows.append({"path": name, "ms": round(timeit(fn, repeat), 3), "bytes": len(out)})
+    add("jsonable_encoder+json.dumps", lambda: json.dumps(jsonable_encoder(resp)).encode())
+    add("pydantic model_dump_json", lambda: resp.model_dump_json(exclude_unset=True))
+    if orjson is not None:
+        add("orjson(model_dump)", lambda: dumps(resp.model_dump(exclude_unset=True)))
+    if msgpack is not None:
+        add("msgpack", lambda: msgpack.packb(resp.model_dump(mode="json", exclude_unset=True)))
+
+    async def fake_run(r, view=None, on_voter=None):
+        return resp
+    main.run_vote_async = fake_run
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    stock = FastAPI()
+    stock.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    @stock.post("/v1/concept/vote", response_model=VoteResponse, response_model_exclude_unset=True)
+    async def stock_vote(r: VoteRequest, view: VoterView = Depends(main.voter_view)):
+        return await main.run_vote_async(r, view=view)
+    body = req.model_dump()
+    for name, client, headers in [("HTTP stock response_model", TestClient(stock), {}),
+                                  ("HTTP api.main JSON", TestClient(main.app), {}),
+                                  ("HTTP api.main msgpack", TestClient(main.app), {"accept": "application/msgpack"})]:
+        if "msgpack" in name and msgpack is None: continue
+        add(name, lambda c=client, h=headers: c.post("/v1/concept/vote", json=body, headers=h).content)
+    for r in rows:
+        print(json.dumps(r))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--voters", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=50)
+    a = ap.parse_args()
+    main_(a.voters, a.repeat)
@@ -0,0 +1,173 @@
+"""Benchmark suite: tally rules, persona generation, prompt building and end-to-end panels.
+
+    python -m bench.suite --out bench-$(git rev-parse --short HEAD).json
+    python -m bench.suite --quick --only tally,prompt
+    python -m bench.suite --compare base.json head.json [--fail-over 1.2]
+
+Every input is drawn from fixed seeds, and the end-to-end panels run against
+the in-process mock LLM (api/backends.py), whose latency is derived from the
+prompt rather than a clock. The only thing that changes between two runs is
+the code and the machine. Results are written as JSON: one row per case
+with median and min wall time over `repeat` runs, plus case-specific
+numbers (voters/s, LLM calls, stage timings). `--compare` lines two result
+files up case by case and exits non-zero when a case got slower than
+`--fail-over` times its baseline.
+"""
+import argparse, json, os, platform, random, statistics, subprocess, sys, time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import api.backends as backends
+import api.runs as runs
+from api.models import VoteRequest
+from api.personas import synthetic_panel, genz_synthetic_panel, personahub_panel
+from api.persona_index import get_index
+from api.stability import bootstrap
+from api.tally import RULES, aggregate
+from api.tally_np import encode_ballots, tally_ranks
+from api.vote import voter_prompt, batch_voter_prompt, run_vote
+
+BRIEF = ("Audience: Gen Z, bold and playful; the can must pop on a crowded shelf; "
+         "avoid anything that reads as a diet drink. Premium but not luxury.")
+SUITES = ("tally", "personas", "prompt", "e2e")
+
+def measure(fn:Callable[[], object], repeat:int) -> dict:
+    fn()   # warm-up
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); times.append(time.perf_counter() - t0)
+    return {"median_ms": round(statistics.median(times) * 1000, 4), "min_ms": round(min(times) * 1000, 4),
+            "repeat": repeat}
+
+def random_ballots(rule:str, options:List[str], n:int, seed:int) -> List[List[str]]:
+    rng = random.Random(seed)
+    if rule == "plurality":
+        return [[rng.choice(options)] for _ in range(n)]
+    if rule == "approval":
+        return [rng.sample(options, rng.randint(1, len(options))) for _ in range(n)]
+    return [rng.sample(options, len(options)) for _ in range(n)]
+
+def bench_tally(quick:bool, seed:int) -> List[dict]:
+    rows = []
+    for m in (3, 6) if quick else (3, 6, 10):
+        options = [f"Option {j}" for j in range(m)]
+        for n in (100, 1000) if quick else (100, 1000, 10000, 100000):
+            repeat = 20 if n <= 1000 else 5
+            for rule in RULES:
+                ballots = random_ballots(rule, options, n, seed)
+                ranks = encode_ballots(options, ballots)
+                case = f"{rule}/options={m}/ballots={n}"
+                rows.append({"bench": "tally.aggregate", "case": case, **measure(lambda: aggregate(rule, options, ballots), repeat)})
+                rows.append({"bench": "tally.ranks", "case": case, **measure(lambda: tally_ranks(rule, options, ranks), repeat)})
+                if n == 1000:
+                    rows.append({"bench": "tally.bootstrap", "case": case + "/resamples=1000",
+                                 **measure(lambda: bootstrap(rule, options, ranks, 1000, 0.95, seed), 5)})
+    return rows
+
+def bench_personas(quick:bool, seed:int) -> List[dict]:
+    rows = []
+    for n in (100, 500) if quick else (100, 500, 5000):
+        rows.append({"bench": "personas.synthetic", "case": f"n={n}", **measure(lambda: synthetic_panel(n, seed), 10)})
+        rows.append({"bench": "personas.genz_synthetic", "case": f"n={n}", **measure(lambda: genz_synthetic_panel(n, seed), 10)})
+        if get_index() is None:
+            rows.append({"bench": "personas.personahub", "case": f"n={n}",
+                         "skipped": "no local PersonaHub snapshot (python -m api.persona_index)"})
+            continue
+        for keyword in (None, "music"):
+            rows.append({"bench": "personas.personahub", "case": f"n={n}/keyword={keyword}",
+                         **measure(lambda: personahub_panel(n, keyword), 5)})
+    return rows
+
+def bench_prompt(quick:bool, seed:int) -> List[dict]:
+    personas = genz_synthetic_panel(1000, seed)
+    options = ["Sunburst Yellow", "Electric Red", "Deep Ocean Blue", "Mint Green"]
+    rows = []
+    for layout in ("shared_prefix", "persona_first"):
+        rows.append({"bench": "prompt.voter_prompt", "case": f"layout={layout}/personas=1000",
+                     **measure(lambda: [voter_prompt(p, BRIEF, "Which can color?", options, "ranking", layout)
+                                        for p in personas], 5 if quick else 20)})
+        rows.append({"bench": "prompt.batch_voter_prompt", "case": f"layout={layout}/personas=1000/k=8",
+                     **measure(lambda: [batch_voter_prompt(personas[j:j+8], BRIEF, "Which can color?", options, "ranking", layout)
+                                        for j in range(0, 1000, 8)], 5 if quick else 20)})
+    return rows
+
+def bench_e2e(quick:bool, seed:int, latency:float) -> List[dict]:
+    """run_vote on the mock backend: no cache, no run storage, no rate limit."""
+    backends.BACKEND, backends.MOCK_SEED = "mock", seed
+    backends.MOCK_LATENCY_S, backends.MOCK_JITTER_S = latency, latency
+    runs.RUNS_PATH = ""
+    rows = []
+    for n in (50, 200) if quick else (50, 200, 500):
+        for k in (1, 8):
+            req = VoteRequest(question="Which color for the new energy drink can?", brief=BRIEF, n_voters=n, seed=seed,
+                              options=["Yellow","Red","Blue"], mode="ranking", rule="borda", voters_per_call=k,
+                              concurrency=16, use_cache=False, bootstrap=0)
+            last = {}
+            def once():
+                last["resp"] = run_vote(req)
+            row = {"bench": "e2e.run_vote", "case": f"voters={n}/voters_per_call={k}/latency={latency:g}",
+                   **measure(once, 1 if quick else 3)}
+            details = last["resp"].details
+            row.update(voters_per_s=round(n / (row["median_ms"] / 1000), 1), llm_calls=details["llm_calls"],
+                       fallbacks=details["fallbacks"], timings=details["timings"])
+            rows.append(row)
+    return rows
+
+def meta(seed:int, quick:bool) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit or None, "created": datetime.now(timezone.utc).isoformat(), "seed": seed, "quick": quick,
+            "python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count()}
+
+def _load(path:str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(base_path:str, head_path:str, fail_over:Optional[float]) -> int:
+    base, head = _load(base_path), _load(head_path)
+    before = {(r["bench"], r["case"]): r for r in base["results"] if "median_ms" in r}
+    worst = 0.0
+    for r in head["results"]:
+        b = before.get((r["bench"], r["case"]))
+        if b is None or "median_ms" not in r: continue
+        ratio = r["median_ms"] / b["median_ms"] if b["median_ms"] else float("inf")
+        worst = max(worst, ratio)
+        flag = "  SLOWER" if fail_over and ratio > fail_over else ""
+        print(f"{r['bench']:<26} {r['case']:<48} {b['median_ms']:>11.3f} -> {r['median_ms']:>11.3f} ms  x{ratio:.2f}{flag}")
+    return 1 if fail_over and worst > fail_over else 0
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--only", default=",".join(SUITES), help=f"comma-separated subset of {','.join(SUITES)}")
+    ap.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--latency", type=float, default=0.05, help="mock LLM latency (and jitter) in seconds")
+    ap.add_argument("--out", help="write results here instead of stdout")
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"))
+    ap.add_argument("--fail-over", type=float, default=None, help="with --compare: exit 1 if a case is this many times slower")
+    args = ap.parse_args()
+    if args.compare:
+        sys.exit(compare(*args.compare, args.fail_over))
+    benches: Dict[str, Callable[[], List[dict]]] = {
+        "tally": lambda: bench_tally(args.quick, args.seed),
+        "personas": lambda: bench_personas(args.quick, args.seed),
+        "prompt": lambda: bench_prompt(args.quick, args.seed),
+        "e2e": lambda: bench_e2e(args.quick, args.seed, args.latency),
+    }
+    results = []
+    for name in args.only.split(","):
+        rows = benches[name.strip()]()
+        for r in rows:
+            print(json.dumps(r), file=sys.stderr)
+        results += rows
+    out = json.dumps({"meta": meta(args.seed, args.quick), "results": results}, indent=1)
+    if args.out:
+        with open(args.out, "w") as f: f.write(out + "\n")
+    else:
+        print(out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import pytest
+import api.cache, api.runs, api.jobs
+
+@pytest.fixture(autouse=True)
+def _local_stores(tmp_path, monkeypatch):
+    """Keep the response cache, run store and job queue of every test in its own temp dir."""
+    monkeypatch.setattr(api.cache, "_cache", api.cache.ResponseCache(str(tmp_path / "votes.sqlite3")))
+    monkeypatch.setattr(api.runs, "_store", api.runs.RunStore(str(tmp_path / "runs.sqlite3")))
+    monkeypatch.setattr(api.jobs, "_queue", api.jobs.JobQueue(api.jobs.JobStore(str(tmp_path / "jobs.sqlite3"))))
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+import api.backends as backends
+import api.ratelimit as ratelimit
+import api.vote as vote
+from api.backends import MockLLM, make_backend, backend_problem, cache_namespace
+from api.vote import poll_voters, new_stats
+from tests.test_vote_engine import make_req
+
+PERSONAS = [{"id":f"P{i}", "age":18 + i % 30, "city":["Austin","Leeds","Pune"][i % 3]} for i in range(30)]
+
+def selections(client, **kw):
+    voters = asyncio.run(poll_voters(client, PERSONAS, make_req(n_voters=30, mode="ranking", **kw), new_stats()))
+    return [v.selection for v in voters]
+
+def test_mock_is_seeded_and_persona_dependent():
+    a = selections(MockLLM(latency=0, jitter=0.01, seed=1), concurrency=30)
+    assert a == selections(MockLLM(latency=0, jitter=0.01, seed=1), concurrency=3)
+    assert len({tuple(s) for s in a}) > 1 and all(sorted(s) == ["Blue","Red","Yellow"] for s in a)
+    assert a != selections(MockLLM(latency=0, jitter=0, seed=2))
+
+def test_mock_failures(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_S", 0.001)
+    stats = new_stats()
+    asyncio.run(poll_voters(MockLLM(latency=0, jitter=0, error_rate=0.5), PERSONAS, make_req(n_voters=30), stats))
+    assert 5 < stats["fallbacks"] < 25
+    stats = new_stats()
+    asyncio.run(poll_voters(MockLLM(latency=0, jitter=0, rate_limit_rate=0.3), PERSONAS, make_req(n_voters=30), stats))
+    assert stats["retries"] > 0 and stats["fallbacks"] == 0
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert backend_problem("openai") == "Missing OPENAI_API_KEY"
+    assert "VOTE_LLM_BASE_URL" in backend_problem("openai_compatible")
+    with pytest.raises(ValueError):
+        make_backend("nope")
+    assert isinstance(make_backend("mock"), MockLLM)
+    monkeypatch.setattr(backends, "BASE_URL", "http://localhost:8001/v1")
+    assert str(make_backend("openai_compatible").base_url).startswith("http://localhost:8001/v1")
+    assert len({cache_namespace("m", b) for b in backends.BACKENDS}) == 3
+
+def test_vote_endpoint_on_mock_backend_needs_no_key(monkeypatch):
+    from api.main import app
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(backends, "BACKEND", "mock")
+    monkeypatch.setattr(vote, "aclient", None)
+    with TestClient(app) as client:
+        r = client.post("/v1/concept/vote", json=make_req(n_voters=10, bootstrap=0).model_dump())
+    assert r.status_code == 200 and r.json()["details"]["fallbacks"] == 0
+
+def test_sweep_runs_grid_over_one_panel(monkeypatch):
+    from api.models import SweepRequest
+    mock, built = MockLLM(latency=0, jitter=0), []
+    monkeypatch.setattr(vote, "get_async_client", lambda: mock)
+    real = vote.gen_personas
+    monkeypatch.setattr(vote, "gen_personas", lambda req: built.append(req) or real(req))
+    body = make_req(n_voters=12, seed=5, use_cache=True, bootstrap=0, mode="ranking", rule="condorcet").model_dump()
+    sweep = SweepRequest(**body, models=["m1","m2"], temperatures=[0.0, 0.9])
+    res = asyncio.run(vote.run_sweep_async(sweep))
+    assert len(built) == 1 and res.sample == 12 and mock.calls == 4 * 12
+    assert res.columns == ["m1@0", "m1@0.9", "m2@0", "m2@0.9"]
+    assert all(len(v) == 4 for v in res.matrix.values()) and 0 < res.agreement <= 1
+    again = asyncio.run(vote.run_sweep_async(sweep))
+    assert mock.calls == 4 * 12 and all(c.details["cache_hits"] == 12 for c in again.cells)
+    assert [c.tallies for c in again.cells] == [c.tallies for c in res.cells]
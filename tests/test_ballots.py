@@ -0,0 +1,28 @@
+from api.ballots import BallotTable
+from api.tally_np import encode_ballots
+
+OPTIONS = ["Yellow","Red","Blue"]
+
+def test_ballot_table_round_trip():
+    outs = [{"selection":["Red","Blue"], "scores":{"Red":0.9, "Blue":0.4, "Pink":1.0}, "justification":"bold", "confidence":0.8},
+            {"selection":["Yellow"], "justification":"bold", "confidence":0.3},
+            {"selection":["Blue","Yellow","Red"], "scores":{"Yellow":0.25}, "justification":"calm"}]
+    t = BallotTable(OPTIONS, 3)
+    for i, o in enumerate(outs):
+        t.set(i, f"V{i}", o)
+    assert t.selections() == [o["selection"] for o in outs]
+    assert (t.ranks == encode_ballots(OPTIONS, t.selections())).all()
+    assert t.justifications == ["", "bold", "calm"]
+    v = t[0]
+    assert v.id == "V0" and v.scores == {"Red":0.9, "Blue":0.4} and v.confidence == 0.8
+    both = BallotTable.concat(OPTIONS, [t, t])
+    assert len(both) == 6 and both.voter_dict(5) == t.voter_dict(2)
+
+def test_ballot_table_rejects_malformed_rows():
+    t = BallotTable(OPTIONS, 1)
+    t.set(0, "V0", {"selection":["Red"], "confidence":0.5})
+    try:
+        t.set(0, "V0", {"selection":["Blue"], "confidence":"very"})
+    except ValueError:
+        pass
+    assert t.selection(0) == ["Red"]
@@ -0,0 +1,19 @@
+import json
+from bench.suite import random_ballots, compare, bench_e2e
+import api.backends as backends
+import api.runs as runs
+
+def test_ballots_are_reproducible():
+    assert random_ballots("borda", ["A","B","C"], 50, 1) == random_ballots("borda", ["A","B","C"], 50, 1)
+
+def test_e2e_runs_on_mock_and_compare_flags_regressions(tmp_path, monkeypatch, capsys):
+    for name in ("BACKEND", "MOCK_SEED", "MOCK_LATENCY_S", "MOCK_JITTER_S"):
+        monkeypatch.setattr(backends, name, getattr(backends, name))
+    monkeypatch.setattr(runs, "RUNS_PATH", runs.RUNS_PATH)
+    rows = bench_e2e(quick=True, seed=0, latency=0.001)
+    assert len(rows) == 4 and all(r["fallbacks"] == 0 and r["llm_calls"] > 0 for r in rows)
+    base, head = tmp_path / "base.json", tmp_path / "head.json"
+    base.write_text(json.dumps({"results": rows}))
+    head.write_text(json.dumps({"results": [dict(r, median_ms=r["median_ms"] * 2) for r in rows]}))
+    assert compare(str(base), str(head), 1.5) == 1 and compare(str(base), str(base), 1.5) == 0
+    assert "SLOWER" in capsys.readouterr().out
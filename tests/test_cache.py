@@ -0,0 +1,17 @@
+import time
+from api.cache import ResponseCache, cache_key
+
+def test_cache_key_covers_prompt_inputs():
+    base = ("gpt-4o-mini", 0.6, 1, {"id":"P1"}, "brief", "q?", ["A","B"], "ranking")
+    assert cache_key(*base) == cache_key(*base)
+    assert cache_key(*base) != cache_key(*base[:6], ["B","A"], "ranking")
+    assert cache_key(*base) != cache_key(base[0], 0.7, *base[2:])
+
+def test_cache_lru_and_ttl(tmp_path):
+    c = ResponseCache(str(tmp_path / "c.sqlite3"), max_entries=2, ttl_s=60)
+    c.put_many({"a":"1", "b":"2"})
+    time.sleep(0.01); c.get_many(["a"])          # "b" is now least recently used
+    time.sleep(0.01); c.put_many({"c":"3"})
+    assert c.get_many(["a","b","c"]) == {"a":"1", "c":"3"}
+    c.ttl_s = 0
+    assert c.get_many(["a","c"]) == {}
@@ -0,0 +1,31 @@
+import asyncio
+from fastapi.testclient import TestClient
+import api.vote as vote
+from bench.mock_llm import create_app, mock_client
+
+def test_make_async_client_uses_tuned_pool(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(vote, "HTTP_MAX_CONNECTIONS", 7)
+    c = vote.make_async_client()
+    assert c.max_retries == 0 and c._client._transport._pool._max_connections == 7
+    asyncio.run(c.close())
+
+def test_open_client_warms_up_and_closes(monkeypatch):
+    mock = create_app()
+    monkeypatch.setattr(vote, "aclient", None)
+    monkeypatch.setattr(vote, "make_async_client", lambda: mock_client(mock))
+    async def run():
+        c = await vote.open_client(warmup=3)
+        assert vote.get_async_client() is c
+        await vote.close_client()
+    asyncio.run(run())
+    assert mock.state.model_lists == 3 and vote.aclient is None
+
+def test_app_lifespan_owns_client(monkeypatch):
+    from api.main import app
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(vote, "aclient", None)
+    monkeypatch.setattr(vote, "make_async_client", lambda: mock_client(create_app()))
+    with TestClient(app):
+        assert vote.aclient is not None
+    assert vote.aclient is None
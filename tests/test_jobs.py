@@ -0,0 +1,88 @@
+import asyncio, time
+from fastapi.testclient import TestClient
+import api.vote as vote
+import api.jobs as jobs
+from api.main import app
+from tests.test_vote_engine import FakeClient, make_req
+
+def fake_panel(monkeypatch, client):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(vote, "get_async_client", lambda: client)
+    monkeypatch.setattr(vote, "gen_personas", lambda req: [{"id":f"P{i}", "likes":"Red"} for i in range(req.n_voters)])
+
+def test_job_submit_poll_and_result(monkeypatch):
+    fake_panel(monkeypatch, FakeClient(delay=0.01))
+    with TestClient(app) as client:
+        r = client.post("/v1/concept/jobs", json=make_req(n_voters=20, bootstrap=0).model_dump())
+        assert r.status_code == 202
+        job_id = r.json()["job_id"]
+        for _ in range(200):
+            status = client.get(f"/v1/concept/jobs/{job_id}").json()
+            if status["status"] == "done": break
+            time.sleep(0.02)
+        assert status["done"] == 20 and status["winner"] == "Red" and status["run_id"]
+        result = client.get(f"/v1/concept/jobs/{job_id}/result", params={"limit":2, "fields":"id"}).json()
+        assert result["winner"] == "Red" and result["voters"] == [{"id":"P0"}, {"id":"P1"}]
+        assert client.get("/v1/concept/jobs/nope").status_code == 404
+
+def test_job_resumes_from_checkpoint(monkeypatch, tmp_path):
+    client = FakeClient(delay=0)
+    fake_panel(monkeypatch, client)
+    calls = []
+    create = client.chat.completions.create
+    async def counting(messages, **kw):
+        calls.append(1)
+        return await create(messages, **kw)
+    client.chat.completions.create = counting
+    store = jobs.JobStore(str(tmp_path / "resume.sqlite3"))
+    req = make_req(n_voters=10, bootstrap=0)
+    store.create("j1", req)      # as if the server died after 6 of 10 ballots
+    store.set_personas("j1", [{"id":f"P{i}", "likes":"Blue"} for i in range(10)])
+    store.add_ballots("j1", {i: {"id":f"P{i}", "selection":["Yellow"], "scores":{}, "justification":"saved", "confidence":1.0}
+                             for i in range(6)})
+    async def run():
+        queue = jobs.JobQueue(store)
+        queue.start()
+        for _ in range(200):
+            status = await queue.status("j1")
+            if status.status == "done": break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return status, await queue.result("j1")
+    status, resp = asyncio.run(run())
+    assert len(calls) == 4 and resp.sample == 10 and resp.details["resumed"] == 6
+    assert [v.selection[0] for v in resp.voters] == ["Yellow"] * 6 + ["Blue"] * 4
+    assert status.winner == "Yellow" and store.load_ballots("j1") == {}
+
+def test_workers_sharing_a_store_run_each_job_once(monkeypatch, tmp_path):
+    client = FakeClient(delay=0.01)
+    fake_panel(monkeypatch, client)
+    calls = []
+    create = client.chat.completions.create
+    async def counting(messages, **kw):
+        calls.append(1)
+        return await create(messages, **kw)
+    client.chat.completions.create = counting
+    store = jobs.JobStore(str(tmp_path / "shared.sqlite3"))
+    for j in range(3):     # left unfinished by a process that stopped cleanly
+        store.create(f"j{j}", make_req(n_voters=5, bootstrap=0))
+    async def run():
+        queues = [jobs.JobQueue(jobs.JobStore(store.path)) for _ in range(3)]   # like uvicorn --workers 3
+        for q in queues: q.start()
+        for _ in range(300):
+            if [(await queues[0].status(f"j{j}")).status for j in range(3)] == ["done"] * 3: break
+            await asyncio.sleep(0.01)
+        for q in queues: await q.stop()
+    asyncio.run(run())
+    assert len(calls) == 3 * 5 and store.unfinished() == []
+
+def test_stale_claims_are_taken_over_and_live_ones_are_not(tmp_path):
+    store = jobs.JobStore(str(tmp_path / "lease.sqlite3"))
+    store.create("j1", make_req())
+    assert store.claim("j1", "a") and not store.claim("j1", "b")
+    assert store.claimable() == [] and store.claimable(lease_s=-1) == ["j1"]
+    assert store.claim("j1", "b", lease_s=-1)     # a's claim went stale
+    store.finish("j1", "done", "{}", owner="a")   # a lost it, so its result is dropped
+    assert store.load("j1")["status"] == "running"
+    store.release("j1", "b")
+    assert store.claimable() == ["j1"] and store.claim("j1", "c")
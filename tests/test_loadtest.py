@@ -0,0 +1,23 @@
+import asyncio
+import httpx
+import api.vote as vote
+from api.main import app
+from bench.loadtest import traffic, drive
+from bench.mock_llm import create_app, mock_client
+
+def test_traffic_mixes_panels_and_is_reproducible():
+    bodies = traffic(200, seed=3)
+    assert bodies == traffic(200, seed=3)
+    assert len({b["n_voters"] for b in bodies}) > 3 and len({(b["mode"], b["rule"]) for b in bodies}) == 5
+
+def test_drive_reports_latency_throughput_and_fallbacks(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    stub = create_app(latency=0.001, malformed_rate=0.3, seed=1)
+    async def run():
+        monkeypatch.setattr(vote, "aclient", mock_client(stub))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+            return await drive(client, [dict(b, n_voters=10) for b in traffic(4)], concurrency=2, duration=30, max_requests=4)
+    row = asyncio.run(run())
+    assert row["requests"] == row["ok"] == 4 and row["latency_s"]["count"] == 4
+    assert row["llm_calls"] == stub.state.calls and 0 < row["repaired"] + row["parse_retries"] <= stub.state.malformed
+    assert row["repair_rate"] == round(row["repaired"] / 40, 4) and row["requests_per_s"] > 0
@@ -0,0 +1,49 @@
+import asyncio, json
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+import api.vote as vote
+from api.backends import MockLLM
+from api.metrics import Histogram, latency_summary
+from tests.test_vote_engine import make_req
+
+class GarbageClient:
+    """Answers every other call with text that is not JSON."""
+    def __init__(self):
+        self.n = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+    async def create(self, **kw):
+        self.n += 1
+        content = "sorry, I can't" if self.n % 2 else json.dumps({"selection":["Red"]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def test_run_details_carry_stage_timings_and_latency(monkeypatch):
+    monkeypatch.setattr(vote, "get_async_client", lambda: MockLLM(latency=0.01, jitter=0))
+    res = asyncio.run(vote.run_vote_async(make_req(n_voters=10, bootstrap=50)))
+    timings = res.details["timings"]
+    for stage in ("personas", "queue", "prompt", "llm_wait", "parse", "validate", "poll", "tally", "bootstrap"):
+        assert stage in timings, stage
+    assert timings["llm_wait"] >= 10 * 0.01 > timings["poll"] / 2
+    assert res.details["llm_latency_s"]["count"] == 10 and res.details["prompt_tokens"] > 0
+
+def test_parse_failures_are_counted(monkeypatch):
+    monkeypatch.setattr(vote, "PARSE_RETRIES", 0)
+    stats = vote.new_stats()
+    personas = [{"id":f"P{i}"} for i in range(6)]
+    asyncio.run(vote.poll_voters(GarbageClient(), personas, make_req(n_voters=6), stats))
+    assert stats["parse_failures"] == 3 == stats["fallbacks"]
+
+def test_histogram_and_metrics_endpoint(monkeypatch):
+    h = Histogram("x_seconds", "x", ["stage"], buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5.0):
+        h.observe(v, stage="a")
+    lines = h.render()
+    assert 'x_seconds_bucket{stage="a",le="0.1"} 1' in lines and 'x_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert latency_summary([0.2, 0.4])["p50"] == 0.4
+    from api.main import app
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(vote, "get_async_client", lambda: MockLLM(latency=0, jitter=0))
+    client = TestClient(app)
+    client.post("/v1/concept/vote", json=make_req(bootstrap=0).model_dump())
+    text = client.get("/metrics").text
+    assert "vote_runs_total" in text and 'vote_llm_call_seconds_count{outcome="ok"}' in text
+    assert 'vote_stage_seconds_bucket{stage="llm_wait",le="+Inf"}' in text and 'vote_llm_tokens_total{kind="prompt"}' in text
@@ -0,0 +1,21 @@
+import sys, random
+from types import SimpleNamespace
+import api.personas as personas
+import api.persona_index as persona_index
+
+WORDS = ["a teacher", "a gamer", "loves social media", "bold and playful", "retired", "gen z student",
+         "young adult nurse", "gaming coach", "energetic runner", "quiet librarian"]
+
+def fake_rows(n=400, seed=5):
+    rng = random.Random(seed)
+    return [{"persona": " ".join(rng.sample(WORDS, 2)) + f" #{i}"} for i in range(n)]
+
+def test_snapshot_panel_matches_streaming_scan(tmp_path, monkeypatch):
+    rows = fake_rows()
+    monkeypatch.setitem(sys.modules, "datasets", SimpleNamespace(load_dataset=lambda *a, **kw: iter(rows)))
+    assert persona_index.ingest(str(tmp_path), limit=None) == len(rows)
+    index = persona_index.PersonaIndex(str(tmp_path))
+    monkeypatch.setattr(persona_index, "get_index", lambda: None)    # force the streaming path
+    for n in (1, 7, 50, 300):
+        for kw in (None, "gaming", "social media", "Young Adult", "astronaut", "gam", "dult nur", "ea"):
+            assert index.panel(n, kw) == personas.personahub_panel(n, kw), (n, kw)
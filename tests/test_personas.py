@@ -0,0 +1,18 @@
+import random
+from collections import Counter
+from api.personas import synthetic_panel, genz_synthetic_panel, ARCHETYPES
+
+def test_seeded_panels_are_reproducible_and_leave_global_state_alone():
+    random.seed(0); before = random.random()
+    random.seed(0)
+    assert synthetic_panel(50, seed=3) == synthetic_panel(50, seed=3)
+    assert genz_synthetic_panel(50, seed=3) == genz_synthetic_panel(50, seed=3)
+    assert synthetic_panel(50, seed=3) != synthetic_panel(50, seed=4)
+    assert random.random() == before
+
+def test_panels_are_stratified_over_archetypes():
+    counts = Counter(p["archetype"] for p in synthetic_panel(53, seed=1))
+    assert set(counts) == {a["name"] for a in ARCHETYPES} and max(counts.values()) - min(counts.values()) <= 1
+    for p in genz_synthetic_panel(40, seed=1):
+        assert 18 <= p["age"] <= 25 and len(p["social_platforms"]) == 2 and p["generation"] == "Gen Z"
+    assert [p["id"] for p in synthetic_panel(3)] == ["SYN000", "SYN001", "SYN002"]
@@ -0,0 +1,38 @@
+import asyncio
+import api.ratelimit as ratelimit
+from api.ratelimit import RateLimiter, TokenBucket
+from api.vote import poll_voters, new_stats
+from bench.mock_llm import create_app, mock_client
+from tests.test_vote_engine import make_req
+
+PERSONAS = [{"id":f"P{i}", "age":20 + i} for i in range(20)]
+
+def test_token_bucket_goes_into_debt():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve(1) == 0 and bucket.reserve(1) == 0
+    assert 0.09 < bucket.reserve(1) <= 0.1
+    bucket.refund(5)
+    assert bucket.level == 2
+
+def test_429s_are_retried_not_fallen_back(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_S", 0.001)
+    app = create_app(rate_limit_rate=0.3, seed=3)
+    stats = new_stats()
+    voters = asyncio.run(poll_voters(mock_client(app), PERSONAS, make_req(n_voters=20, concurrency=8), stats))
+    assert stats["fallbacks"] == 0 and all(v.justification == "Mock ballot." for v in voters)
+    assert stats["rate_limited"] == app.state.rate_limited > 0 and stats["retries"] == stats["rate_limited"]
+
+def test_backoff_sleep_is_not_counted_as_llm_wait():
+    app = create_app(rate_limit_rate=0.3, retry_after=0.05, seed=3)
+    stats = new_stats()
+    asyncio.run(poll_voters(mock_client(app), PERSONAS, make_req(n_voters=20, concurrency=8), stats))
+    assert stats["retries"] > 0 and stats["timings"]["backoff"] >= 0.05 * stats["retries"]
+    assert stats["timings"]["llm_wait"] < stats["timings"]["backoff"]
+
+def test_limiter_keeps_panel_under_server_rpm(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_S", 0.001)
+    app = create_app(rpm=1320, burst_s=0.25)          # the limiter runs 10% under the server's budget
+    monkeypatch.setattr(ratelimit, "_limiter", RateLimiter(rpm=1200, burst_s=0.25))
+    stats = new_stats()
+    asyncio.run(poll_voters(mock_client(app), PERSONAS[:10], make_req(n_voters=10, concurrency=10), stats))
+    assert stats["throttled"] >= 5 and stats["rate_limited"] == 0 and stats["fallbacks"] == 0
@@ -0,0 +1,44 @@
+import pytest
+from api.repair import BallotError, LabelMatcher, load_json, repair_ballot
+
+OPTIONS = ["Yellow", "Deep Ocean Blue", "Red"]
+
+@pytest.mark.parametrize("raw", [
+    '```json\n{"selection": ["Red"], "confidence": 0.5,}\n```',
+    "Here you go: {'selection': ['Red'], 'confidence': 0.5} Thanks!",
+    '{“selection”: [“Red”], “confidence”: 0.5}',
+    'Sure [note]: {"selection": ["Red"], "confidence": 0.5}',
+    '{"selection": ["Red"], "confidence": 0.5}\nNote: I avoided the {diet} cue.',
+    '{"selection": ["Red"], "confidence": 0.5}\n(Alternatively {"selection": ["Blue"]} would also fit.)',
+])
+def test_load_json_repairs_common_defects(raw):
+    value, fixes = load_json(raw)
+    assert value == {"selection": ["Red"], "confidence": 0.5} and fixes == ["json"]
+
+def test_load_json_keeps_the_complete_fields_of_a_truncated_answer():
+    value, fixes = load_json('{"selection": ["Red", "Yellow"], "scores": {"Red": 0.9, "Yellow": 0.')
+    assert value == {"selection": ["Red", "Yellow"], "scores": {"Red": 0.9}} and fixes == ["truncated"]
+    with pytest.raises(BallotError):
+        load_json("I'd rather not say.")
+
+def test_repair_ballot_matches_labels_and_fills_ranks():
+    m = LabelMatcher(OPTIONS)
+    ballot, fixes = repair_ballot({"selection": ["  deep ocean  BLUE ", "red."], "scores": {"yellow": "0.2", "Red": 2},
+                                   "confidence": "0.8"}, m, "ranking")
+    assert ballot["selection"] == ["Deep Ocean Blue", "Red", "Yellow"]
+    assert ballot["scores"] == {"Yellow": 0.2, "Red": 1.0} and ballot["confidence"] == 0.8
+    assert {"label", "score", "ranks", "confidence"} <= set(fixes)
+    assert repair_ballot({"selection": ["Red", "red", "Yellow"]}, m, "forced_choice")[0]["selection"] == ["Red"]
+    clean, fixes = repair_ballot({"selection": ["Red"], "scores": {"Red": 0.5}, "confidence": 0.5}, m, "approval")
+    assert clean["selection"] == ["Red"] and fixes == []
+
+def test_repair_ballot_refuses_to_guess():
+    m = LabelMatcher(["Red", "Electric Red"])
+    for label in ("Not Red", "anything but Electric Red", "I would never pick red", "the red one"):
+        assert m.match(label) == (None, False)
+        with pytest.raises(BallotError):
+            repair_ballot({"selection": [label]}, m, "forced_choice")
+    assert repair_ballot({"selection": ["Not Red", " electric  red"]}, m, "forced_choice")[0]["selection"] == ["Electric Red"]
+    for out in ({"selection": ["Purple"]}, {"selection": []}, {"scores": {"Red": 1}}, ["Red"]):
+        with pytest.raises(BallotError):
+            repair_ballot(out, m, "forced_choice")
@@ -0,0 +1,37 @@
+import sqlite3
+from fastapi.testclient import TestClient
+from api.main import app
+from api.models import VoteRequest
+from api.ballots import BallotTable
+from api.runs import RunStore, get_run_store
+
+def test_retally_stored_run():
+    req = VoteRequest(question="Which color?", brief="Audience: Gen Z, bold playful; pop on shelf; avoid diet cues.",
+                      options=["A","B","C"], mode="ranking", rule="plurality", n_voters=5)
+    ranks = [["A","B","C"],["B","A","C"],["A","C","B"],["C","B","A"],["B","C","A"]]
+    ballots = BallotTable(req.options, len(ranks))
+    for i, r in enumerate(ranks):
+        ballots.set(i, f"V{i}", {"selection": r, "confidence": 1})
+    get_run_store().save("r1", req, ballots)
+    client = TestClient(app)
+    body = client.get("/v1/concept/runs/r1/tally").json()
+    by_rule = {r["rule"]: r for r in body["results"]}
+    assert body["sample"] == 5 and set(by_rule) == {"plurality","approval","borda","condorcet"}
+    assert by_rule["plurality"]["winners"] == ["A","B"] and by_rule["borda"]["winner"] == "B"
+    assert by_rule["condorcet"]["winner"] == "B"
+    one = client.get("/v1/concept/runs/r1/tally", params={"rule":"borda"}).json()
+    assert [r["rule"] for r in one["results"]] == ["borda"]
+    assert client.get("/v1/concept/runs/nope/tally").status_code == 404
+
+def test_save_into_database_with_legacy_voters_column(tmp_path):
+    path = str(tmp_path / "legacy.sqlite3")
+    with sqlite3.connect(path) as db:
+        db.execute("""CREATE TABLE runs (run_id TEXT PRIMARY KEY, created REAL NOT NULL,
+                      request TEXT NOT NULL, selections TEXT NOT NULL, voters TEXT NOT NULL)""")
+    req = VoteRequest(question="Which color?", brief="Audience: Gen Z, bold playful; pop on shelf; avoid diet cues.",
+                      options=["A","B"], mode="forced_choice", rule="plurality", n_voters=5)
+    ballots = BallotTable(req.options, 1)
+    ballots.set(0, "V0", {"selection": ["B"], "confidence": 1})
+    store = RunStore(path)
+    store.save("old", req, ballots)
+    assert store.load_ballots("old")[1] == [["B"]]
@@ -0,0 +1,46 @@
+import random
+import numpy as np
+from api.tally import plurality, approval, borda, condorcet, aggregate
+from api.tally_np import encode_ballots, pairwise
+
+OPTIONS = ["A","B","C","D","E"]
+
+def random_ballots(n, mode, rng):
+    out = []
+    for _ in range(n):
+        order = rng.sample(OPTIONS, len(OPTIONS))
+        out.append(order[:1] if mode == "forced_choice" else order[:rng.randint(1, 5)] if mode == "approval" else order)
+    return out
+
+def test_array_engine_matches_reference():
+    rng = random.Random(7)
+    for mode in ("forced_choice","approval","ranking"):
+        for n in (1, 6, 301):
+            ballots = random_ballots(n, mode, rng)
+            assert aggregate("plurality", OPTIONS, ballots)[:2] == plurality(OPTIONS, [b[:1] for b in ballots])
+            assert aggregate("approval", OPTIONS, ballots)[:2] == approval(OPTIONS, ballots)
+            assert aggregate("borda", OPTIONS, ballots)[:2] == borda(OPTIONS, ballots)
+            pair, winners = condorcet(OPTIONS, ballots)
+            assert aggregate("condorcet", OPTIONS, ballots)[:2] == ({"pairwise": pair}, winners)
+
+def test_weighted_pairwise_matches_resampled_panels():
+    rng = random.Random(3)
+    ballots = random_ballots(50, "ranking", rng)
+    ranks = encode_ballots(OPTIONS, ballots)
+    idx = np.random.default_rng(0).integers(0, 50, size=(4, 50))
+    weights = np.stack([np.bincount(row, minlength=50) for row in idx])
+    stacked = pairwise(ranks, weights)
+    for b in range(4):
+        assert (stacked[b] == pairwise(ranks[idx[b]])).all()
+
+def test_bootstrap_win_probabilities():
+    from api.stability import bootstrap
+    ballots = [["A","B","C","D","E"]] * 70 + [["B","A","C","D","E"]] * 30
+    ranks = encode_ballots(OPTIONS, ballots)
+    out = bootstrap("plurality", OPTIONS, ranks, resamples=3000, seed=1)
+    assert out["win_probability"]["A"] > 0.99 and abs(sum(out["win_probability"].values()) - 1) < 1e-6
+    lo, hi = out["ci"]["A"]
+    assert lo < 70 < hi and hi - lo < 25
+    assert bootstrap("plurality", OPTIONS, ranks, 500, seed=2) == bootstrap("plurality", OPTIONS, ranks, 500, seed=2)
+    cond = bootstrap("condorcet", OPTIONS, ranks, resamples=500, seed=1)
+    assert cond["win_probability"]["A"] > 0.99 and cond["ci"]["A"][0] == 4
@@ -0,0 +1,206 @@
+import asyncio, json, re, time
+from types import SimpleNamespace
+from api.models import VoteRequest
+from api.vote import poll_voters, new_stats
+
+class FakeClient:
+    """Stands in for AsyncOpenAI: votes for the option named in the persona after `delay` seconds."""
+    def __init__(self, delay=0.05, skip=()):
+        self.delay, self.inflight, self.peak, self.skip = delay, 0, 0, skip
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **kw):
+        self.inflight += 1; self.peak = max(self.peak, self.inflight)
+        await asyncio.sleep(self.delay)
+        self.inflight -= 1
+        found = re.findall(r'"id": "(\w+)", "likes": "(\w+)"', messages[-1]["content"])
+        ballots = [{"id":i, "selection":[likes], "scores":{}, "justification":"ok", "confidence":0.9} for i, likes in found]
+        if len(found) > 1:     # batched prompt; personas in `skip` go missing from the answer
+            content = json.dumps({"ballots":[b for b in ballots if b["id"] not in self.skip]})
+        else:
+            content = json.dumps(ballots[0])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def make_req(**kw):
+    kw.setdefault("use_cache", False)
+    kw.setdefault("n_voters", 5)
+    return VoteRequest(question="Which color?", brief="Audience: Gen Z, bold playful; pop on shelf; avoid diet cues.",
+                       options=["Yellow","Red","Blue"], **kw)
+
+def test_poll_voters_bounded_and_ordered():
+    personas = [{"id":f"P{i}", "likes":["Yellow","Red","Blue"][i % 3]} for i in range(40)]
+    client, stats = FakeClient(), new_stats()
+    t0 = time.perf_counter()
+    voters = asyncio.run(poll_voters(client, personas, make_req(concurrency=10), stats))
+    elapsed = time.perf_counter() - t0
+    assert [v.id for v in voters] == [p["id"] for p in personas]
+    assert [v.selection[0] for v in voters] == [p["likes"] for p in personas]
+    assert client.peak == 10 and elapsed < 0.05 * 40 / 2
+    assert stats["fallbacks"] == 0
+
+def test_poll_voters_deadline_falls_back():
+    personas = [{"id":f"P{i}", "likes":"Blue"} for i in range(6)]
+    stats = new_stats()
+    voters = asyncio.run(poll_voters(FakeClient(delay=0.2), personas, make_req(concurrency=3, deadline_s=0.3), stats))
+    assert [v.selection[0] for v in voters[:3]] == ["Blue"] * 3
+    assert all(v.justification == "fallback" and v.selection == ["Yellow"] for v in voters[3:])
+    assert stats["timed_out"] == 3
+
+def test_run_vote_async_uses_shared_client(monkeypatch):
+    import api.vote as vote
+    client = FakeClient(delay=0.01)
+    monkeypatch.setattr(vote, "get_async_client", lambda: client)
+    monkeypatch.setattr(vote, "gen_personas", lambda req: [{"id":f"P{i}", "likes":"Red"} for i in range(req.n_voters)])
+    res = asyncio.run(vote.run_vote_async(make_req()))
+    assert res.winner == "Red" and res.sample == 5 and res.details["fallbacks"] == 0
+
+def test_poll_voters_replays_cache(monkeypatch, tmp_path):
+    import api.vote as vote
+    from api.cache import ResponseCache
+    monkeypatch.setattr(vote, "get_cache", lambda: ResponseCache(str(tmp_path / "c.sqlite3")))
+    personas = [{"id":f"P{i}", "likes":"Blue"} for i in range(8)]
+    client = FakeClient(delay=0)
+    first, second = new_stats(), new_stats()
+    asyncio.run(poll_voters(client, personas, make_req(use_cache=True, seed=1), first))
+    client.chat.completions.create = None    # any call now would fail into the fallback
+    voters = asyncio.run(poll_voters(client, personas, make_req(use_cache=True, seed=1), second))
+    assert first["cache_misses"] == 8 and second["cache_hits"] == 8 and second["fallbacks"] == 0
+    assert all(v.selection == ["Blue"] for v in voters)
+    unseeded = new_stats()    # no seed: never replayed, so every voter is asked
+    asyncio.run(poll_voters(FakeClient(delay=0), personas, make_req(use_cache=True), unseeded))
+    assert unseeded["cache_hits"] == unseeded["cache_misses"] == 0 and unseeded["llm_calls"] == 8
+
+def test_poll_panel_stops_once_decided():
+    from api.vote import poll_panel
+    personas = [{"id":f"P{i}", "likes":"Red"} for i in range(200)]
+    stats = new_stats()
+    voters = asyncio.run(poll_panel(FakeClient(delay=0), personas, make_req(early_stop=True, batch_size=20, min_voters=20, seed=1), stats))
+    assert len(voters) == 20 and stats["stopped_early"] == 1
+    split = [{"id":f"P{i}", "likes":["Red","Blue"][i % 2]} for i in range(60)]
+    voters = asyncio.run(poll_panel(FakeClient(delay=0), split, make_req(early_stop=True, batch_size=20, seed=1), new_stats()))
+    assert len(voters) == 60
+
+def test_tiny_unanimous_batch_does_not_stop_the_panel():
+    from api.vote import poll_panel
+    from api.stability import is_decided
+    from api.tally_np import encode_ballots
+    assert not is_decided("plurality", ["Red","Blue"], encode_ballots(["Red","Blue"], [["Red"]] * 5), 0.99)
+    assert not is_decided("plurality", ["Red","Blue"], encode_ballots(["Red","Blue"], [["Red"]] * 9 + [["Blue"]]), 0.99)
+    approvals = encode_ballots(["A","B"], [["A","B"]] * 400 + [["B"]] * 100)   # B approved by all, mostly listed second
+    assert is_decided("approval", ["A","B"], approvals, 0.99)
+    personas = [{"id":f"P{i}", "likes":"Red"} for i in range(500)]
+    stats = new_stats()
+    voters = asyncio.run(poll_panel(FakeClient(delay=0), personas, make_req(early_stop=True, batch_size=5, min_voters=1, seed=1), stats))
+    assert 5 < len(voters) < 500 and stats["stopped_early"] == 1
+    voters = asyncio.run(poll_panel(FakeClient(delay=0), personas, make_req(early_stop=True, batch_size=5, seed=1), new_stats()))
+    assert len(voters) >= 30
+
+def test_stream_vote_events(monkeypatch):
+    import api.vote as vote
+    monkeypatch.setattr(vote, "get_async_client", lambda: FakeClient(delay=0.01))
+    monkeypatch.setattr(vote, "gen_personas", lambda req: [{"id":f"P{i}", "likes":"Blue"} for i in range(req.n_voters)])
+    async def collect():
+        return [e async for e in vote.stream_vote(make_req(n_voters=10), tally_every=5)]
+    events = asyncio.run(collect())
+    kinds = [e["event"] for e in events]
+    assert kinds.count("voter") == 10 and kinds.count("tally") == 2 and kinds[-1] == "result"
+    assert sorted(e["index"] for e in events if e["event"] == "voter") == list(range(10))
+    assert events[-1]["response"]["winner"] == "Blue"
+
+def test_poll_voters_batched_with_partial_answers():
+    personas = [{"id":f"P{i}", "likes":["Yellow","Red","Blue"][i % 3]} for i in range(20)]
+    stats = new_stats()
+    voters = asyncio.run(poll_voters(FakeClient(delay=0, skip={"P4","P9"}), personas, make_req(voters_per_call=5), stats))
+    assert [v.selection[0] for v in voters] == [p["likes"] for p in personas]
+    assert stats["llm_calls"] == 4 + 2 and stats["batch_retries"] == 2 and stats["fallbacks"] == 0
+
+def test_shared_prefix_layout_puts_persona_last():
+    import os
+    from api.vote import voter_prompt
+    args = ("Audience: Gen Z, bold playful; pop on shelf.", "Which color?", ["Yellow","Red"], "ranking")
+    a = voter_prompt({"id":"P1", "age":19}, *args, layout="shared_prefix")
+    b = voter_prompt({"id":"P2", "age":31}, *args, layout="shared_prefix")
+    prefix = os.path.commonprefix([a, b])
+    assert "Return STRICT JSON" in prefix and prefix.endswith('Persona:\n{"id": "P')
+    assert voter_prompt({"id":"P1"}, *args).lstrip().startswith("Persona:")
+
+def test_vote_endpoint_pages_and_selects_voter_fields(monkeypatch):
+    import api.vote as vote
+    from fastapi.testclient import TestClient
+    from api.main import app
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(vote, "get_async_client", lambda: FakeClient(delay=0))
+    monkeypatch.setattr(vote, "gen_personas", lambda req: [{"id":f"P{i}", "likes":"Red"} for i in range(req.n_voters)])
+    body = make_req(n_voters=20, bootstrap=0).model_dump()
+    client = TestClient(app)
+    page = client.post("/v1/concept/vote", json=body, params={"offset":5, "limit":3, "fields":"id,selection"}).json()
+    assert page["sample"] == 20 and page["winner"] == "Red"
+    assert page["voters"] == [{"id":f"P{i}", "selection":["Red"]} for i in (5, 6, 7)]
+    assert client.post("/v1/concept/vote", json=body, params={"summary":True}).json()["voters"] == []
+    assert len(client.post("/v1/concept/vote", json=body).json()["voters"][0]) == 5
+    assert client.post("/v1/concept/vote", json=body, params={"fields":"id,nope"}).status_code == 422
+
+def test_vote_endpoint_msgpack(monkeypatch):
+    import pytest
+    msgpack = pytest.importorskip("msgpack")
+    import api.vote as vote
+    from fastapi.testclient import TestClient
+    from api.main import app
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(vote, "get_async_client", lambda: FakeClient(delay=0))
+    monkeypatch.setattr(vote, "gen_personas", lambda req: [{"id":f"P{i}", "likes":"Blue"} for i in range(req.n_voters)])
+    r = TestClient(app).post("/v1/concept/vote", json=make_req(bootstrap=0).model_dump(), headers={"accept":"application/msgpack"})
+    assert r.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(r.content)["winner"] == "Blue"
+
+def test_run_batch_shares_panel_and_concurrency(monkeypatch):
+    import api.vote as vote
+    from api.models import BatchVoteRequest
+    client, built = FakeClient(delay=0.01), []
+    monkeypatch.setattr(vote, "get_async_client", lambda: client)
+    monkeypatch.setattr(vote, "gen_personas", lambda req: built.append(req) or [{"id":f"P{i}", "likes":"Red"} for i in range(req.n_voters)])
+    batch = BatchVoteRequest(brief="Audience: Gen Z, bold playful; pop on shelf; avoid diet cues.", n_voters=12,
+                             concurrency=4, use_cache=False, bootstrap=0,
+                             questions=[{"question":"Which color?", "options":["Yellow","Red","Blue"]},
+                                        {"question":"Which can color?", "options":["Red","Black"], "rule":"borda", "mode":"ranking"},
+                                        {"question":"Which label color?", "options":["Green","Red"]}])
+    res = asyncio.run(vote.run_batch_async(batch))
+    assert len(built) == 1 and client.peak == 4 and res.sample == 12
+    assert [r.question for r in res.results] == [q.question for q in batch.questions]
+    assert [r.winner for r in res.results] == ["Red"] * 3 and res.results[1].rule == "borda"
+    assert len({r.run_id for r in res.results}) == 3
+
+def test_poll_voters_repairs_answers_and_retries_only_the_unrecoverable():
+    import api.vote as vote
+    calls = {}
+    async def create(messages, **kw):
+        pid = re.search(r'"id": "(\w+)"', messages[-1]["content"]).group(1)
+        calls[pid] = calls.get(pid, 0) + 1
+        if pid == "P0":     # truncated, lowercase, partial ranking: repaired in place
+            content = '{"selection": ["blue ", "yellow"], "confidence": 0.'
+        elif pid == "P1" and calls[pid] == 1:     # no ballot at all: asked again
+            content = "Sorry, I can't help with that."
+        else:
+            content = json.dumps({"selection":["Red","Blue","Yellow"], "confidence":0.9})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    stats = new_stats()
+    voters = asyncio.run(poll_voters(client, [{"id":f"P{i}"} for i in range(4)], make_req(mode="ranking", rule="borda"), stats))
+    assert voters[0].selection == ["Blue","Yellow","Red"] and voters[1].selection == ["Red","Blue","Yellow"]
+    assert calls == {"P0":1, "P1":2, "P2":1, "P3":1}
+    assert stats["repaired"] == 1 and stats["parse_retries"] == 1 and stats["parse_failures"] == 1
+    assert stats["fallbacks"] == 0
+    details = vote.build_response(make_req(mode="ranking", rule="borda"), voters, stats).details
+    assert details["repair_rate"] == details["retry_rate"] == 0.25
+
+def test_calls_without_deadline_still_time_out(monkeypatch):
+    import api.vote as vote
+    seen = []
+    async def create(messages, timeout=None, **kw):
+        seen.append(timeout)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"selection":["Red"]})))])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(vote, "CALL_TIMEOUT_S", 7.0)
+    asyncio.run(poll_voters(client, [{"id":"P0"}], make_req(), new_stats()))
+    asyncio.run(poll_voters(client, [{"id":"P1"}], make_req(deadline_s=30), new_stats()))
+    assert seen[0] == 7.0 and 0 < seen[1] <= 30